@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Iterator, Optional
+
+
+class Accountant:
+	"""
+	A class used to account for the resources used by the phases of a run of the program
+
+	Phases can be nested, the time spent in a nested phase not being accounted to the enclosing one, so that the wall
+	times of the phases add up.
+
+	...
+
+	Attributes
+	----------
+	start : float
+		the time the accounting started at, from the performance counter
+	wall : dict[str, float]
+		the wall time spent in each phase, in seconds
+	calls : dict[str, int]
+		the number of times each phase has been entered
+	runs : int
+		the number of simulations accounted for
+	simulated : float
+		the time simulated, in microseconds
+	events : int
+		the number of emissions simulated, as transmissions of framelets or fragments by the ports
+	framelets : int
+		the number of framelets released
+	sites : int
+		the number of top allocation sites reported, if memory is traced
+	labels : dict[str, str]
+		labels identifying the run in the report, such as the files involved
+
+	Methods
+	-------
+	phase(name)
+		Accounts the wall time of a block to a phase
+	record(simulated, events, framelets)
+		Accounts for a simulation
+	report()
+		Returns the accounting as a JSON-serializable dictionary
+	save(file)
+		Writes the accounting into a JSON file
+	"""
+
+	def __init__(self: Accountant, memory: bool = False, sites: int = 10) -> None:
+		self.start = perf_counter()
+		self.wall: dict[str, float] = defaultdict(float)
+		self.calls: dict[str, int] = defaultdict(int)
+		self.runs = 0
+		self.simulated = 0.0
+		self.events = 0
+		self.framelets = 0
+		self.sites = sites if memory else 0
+		self.labels: dict[str, str] = {}
+		self._stack: list[tuple[str, float]] = []
+
+		if memory:
+			tracemalloc.start()
+
+	@contextmanager
+	def phase(self: Accountant, name: str) -> Iterator[None]:
+		"""Accounts the wall time of a block to a phase, pausing the enclosing phase if any."""
+
+		now = perf_counter()
+
+		if self._stack:
+			parent, since = self._stack[-1]
+			self.wall[parent] += now - since
+
+		self._stack.append((name, now))
+		self.calls[name] += 1
+
+		try:
+			yield
+		finally:
+			now = perf_counter()
+			_, since = self._stack.pop()
+			self.wall[name] += now - since
+
+			if self._stack:
+				self._stack[-1] = (self._stack[-1][0], now)
+
+	def record(self: Accountant, simulated: float, events: int, framelets: int) -> None:
+		"""Accounts for a simulation, given the time it simulated and the emissions and framelets it processed."""
+
+		self.runs += 1
+		self.simulated += simulated
+		self.events += events
+		self.framelets += framelets
+
+	def report(self: Accountant) -> dict[str, Any]:
+		"""Returns the accounting as a JSON-serializable dictionary.
+
+		Returns
+		-------
+		dict[str, Any]
+			The labels, the wall time and calls of each phase, the simulation throughput, and the peak traced memory
+			with its top allocation sites if memory is traced.
+		"""
+
+		simulating = self.wall.get("simulate", 0.0)
+
+		def rate(value: float) -> Optional[float]:
+			return value / simulating if simulating > 0 else None
+
+		memory = None
+
+		if tracemalloc.is_tracing():
+			_, peak = tracemalloc.get_traced_memory()
+			statistics = tracemalloc.take_snapshot().statistics("lineno")[:self.sites]
+			memory = {
+				"peak": peak,
+				"top": [
+					{
+						"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+						"size": stat.size,
+						"count": stat.count,
+					}
+					for stat in statistics
+				],
+			}
+
+		return {
+			**self.labels,
+			"total": perf_counter() - self.start,
+			"phases": {name: {"wall": wall, "calls": self.calls[name]} for name, wall in self.wall.items()},
+			"simulation": {
+				"runs": self.runs,
+				"simulated": self.simulated,
+				"events": self.events,
+				"framelets": self.framelets,
+				"simulated_per_second": rate(self.simulated),
+				"events_per_second": rate(self.events),
+				"framelets_per_second": rate(self.framelets),
+			},
+			"memory": memory,
+		}
+
+	def save(self: Accountant, file: Path) -> Path:
+		"""Writes the accounting into a JSON file.
+
+		Parameters
+		----------
+		file : Path
+			The JSON file to write.
+
+		Returns
+		-------
+		file : Path
+			The JSON file written.
+		"""
+
+		file.write_text(json.dumps(self.report(), indent="\t"))
+
+		return file
+
+
+# The active accountant, if any. Phases are only timed while there is one.
+accountant: Optional[Accountant] = None
+
+
+def enable(memory: bool = False, sites: int = 10) -> Accountant:
+	"""Creates an accountant, tracing memory allocations if `memory`, and makes it the active one."""
+
+	global accountant
+	accountant = Accountant(memory, sites)
+
+	return accountant
+
+
+def disable() -> None:
+	"""Deactivates the active accountant, and stops tracing memory allocations."""
+
+	global accountant
+	accountant = None
+
+	if tracemalloc.is_tracing():
+		tracemalloc.stop()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+	"""Accounts the wall time of a block to a phase of the active accountant, if any."""
+
+	if accountant is None:
+		yield
+	else:
+		with accountant.phase(name):
+			yield
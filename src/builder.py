@@ -1,14 +1,22 @@
 from collections import defaultdict
-from itertools import islice
 from logging import getLogger
 from math import lcm
 from pathlib import Path
 from xml.etree.ElementTree import Element, dump, indent, parse
 
+import accounting
+
+from compiled import CompiledNetwork, compile_network
+
 from model import Device, EndSystem, Stream, StreamInstance, Switch
 
+from policy import POLICIES
+
+from routing import balance_routes, greedy_routes
+
+from tas import insert_gate_control_lists
+
 from networkx import DiGraph  # type: ignore
-from networkx.algorithms.connectivity.disjoint_paths import node_disjoint_paths  # type: ignore
 
 
 def _insert_devices(root: Element, network: DiGraph) -> DiGraph:
@@ -17,7 +25,8 @@ def _insert_devices(root: Element, network: DiGraph) -> DiGraph:
 	Parameters
 	----------
 	root : Element
-		an XML element containing devices
+		an XML element containing devices, where switches may override the egress policy of the run with a `policy`
+		attribute. Devices are indexed in document order.
 	network : DiGraph
 		a graph
 
@@ -28,10 +37,14 @@ def _insert_devices(root: Element, network: DiGraph) -> DiGraph:
 	"""
 
 	network.add_nodes_from(
-		EndSystem(device.get("name"))
+		EndSystem(device.get("name"), index=index)
 		if device.get("type") == "EndSystem"
-		else Switch(device.get("name"))
-		for device in root.iter("device")
+		else Switch(
+			device.get("name"),
+			policy=POLICIES[device.get("policy")]() if device.get("policy") else None,
+			index=index,
+		)
+		for index, device in enumerate(root.iter("device"))
 	)
 
 	return network
@@ -90,9 +103,10 @@ def _extract_streams(root: Element, network: DiGraph) -> set[Stream]:
 			int(_stream.get("period")),
 			int(_stream.get("deadline")),
 			int(_stream.get("rl")),
+			priority=int(_stream.get("priority", 0)),
+			express=_stream.get("express", "false") == "true",
+			offset=float(_stream.get("offset", 0.0)),
 		)
-		stream.routes = list(islice(node_disjoint_paths(network, stream.src, stream.dest), stream.rl))
-
 		streams.add(stream)
 
 	return streams
@@ -115,7 +129,7 @@ def _compute_hyperperiod(streams: set[Stream]) -> int:
 	return lcm(*{stream.period for stream in streams})
 
 
-def _schedule_stream_instantiations(streams: set[Stream], hyperperiod: int) -> dict[int, set[Stream]]:
+def schedule_stream_instantiations(streams: set[Stream], hyperperiod: int) -> dict[float, set[Stream]]:
 	"""Associates a time to a set of streams for emission.
 	If for example we have the entry '(50, {stream0, stream3})', it means that the streams 'stream0' and 'stream3' are
 	to be emitted at time 50, hyperperiod-wise.
@@ -129,14 +143,14 @@ def _schedule_stream_instantiations(streams: set[Stream], hyperperiod: int) -> d
 
 	Returns
 	-------
-	emission_times : dict[int, set[Stream]]
+	emission_times : dict[float, set[Stream]]
 		A dictionary with emission times as keys, and a set of emitted streams as value
 	"""
 
-	stream_emission_times: dict[Stream, set[int]] = {
-		stream: {i * stream.period for i in range(int(hyperperiod / stream.period))} for stream in streams
+	stream_emission_times: dict[Stream, set[float]] = {
+		stream: {i * stream.period + stream.offset for i in range(int(hyperperiod / stream.period))} for stream in streams
 	}
-	emission_times: dict[int, set[Stream]] = defaultdict(set)
+	emission_times: dict[float, set[Stream]] = defaultdict(set)
 
 	for stream, times in stream_emission_times.items():
 		for time in times:
@@ -205,8 +219,10 @@ def _get_receiving_devices(network: DiGraph, streams: set[Stream]) -> set[Device
 	return receiving_devices
 
 
-def build(file: Path) -> tuple[DiGraph, set[Stream], dict[int, set[Stream]], set[Device], set[Device], int]:
+def build(file: Path, routing: str = "greedy") \
+	-> tuple[DiGraph, set[Stream], dict[float, set[Stream]], set[Device], set[Device], int, CompiledNetwork]:
 	"""Prints the input file, builds the network and the streams, draws the graph and return the data.
+	The network is also compiled into integer-indexed arrays for the simulation.
 
 	Constraints
 	----------
@@ -216,11 +232,15 @@ def build(file: Path) -> tuple[DiGraph, set[Stream], dict[int, set[Stream]], set
 	----------
 	file : Path
 		An *.xml file from which import the network and streams.
+	routing : str
+		The route selection: "greedy" takes the first node-disjoint routes of each stream, and "balanced" reroutes
+		the streams to balance the link utilization.
 
 	Returns
 	-------
-	tuple[DiGraph, set[Stream]]
-		A tuple containing the network as a DiGraph and a set of streams.
+	tuple[DiGraph, set[Stream], dict[float, set[Stream]], set[Device], set[Device], int, CompiledNetwork]
+		A tuple containing the network as a DiGraph, a set of streams, their emission times, the emitting and receiving
+		devices, the hyperperiod and the compiled network.
 	"""
 
 	logger = getLogger()
@@ -231,11 +251,23 @@ def build(file: Path) -> tuple[DiGraph, set[Stream], dict[int, set[Stream]], set
 	indent(root, space="\t")
 	dump(root)
 
-	network = _insert_links(root, _insert_devices(root, DiGraph()))
+	network = insert_gate_control_lists(root, _insert_links(root, _insert_devices(root, DiGraph())))
 	streams = _extract_streams(root, network)
-	hyperperiod = _compute_hyperperiod(streams)
-	stream_instantiations = _schedule_stream_instantiations(streams, hyperperiod)
+
+	with accounting.phase("routing"):
+		for stream in streams:
+			stream.routes = greedy_routes(network, stream)
+
+		if routing == "balanced":
+			balance_routes(network, streams)
+
+	with accounting.phase("schedule"):
+		hyperperiod = _compute_hyperperiod(streams)
+		stream_instantiations = schedule_stream_instantiations(streams, hyperperiod)
 
 	logger.info("done.")
 
-	return network, streams, stream_instantiations, _get_emitting_devices(network, streams), _get_receiving_devices(network, streams), hyperperiod
+	return (
+		network, streams, stream_instantiations, _get_emitting_devices(network, streams),
+		_get_receiving_devices(network, streams), hyperperiod, compile_network(network, streams),
+	)
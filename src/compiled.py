@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, TYPE_CHECKING
+
+from model import Device, EndSystem, Port, Stream
+
+from policy import EgressPolicy
+
+from networkx import DiGraph  # type: ignore
+
+if TYPE_CHECKING:
+	from tas import GateControlList
+
+
+class DeviceKind(IntEnum):
+	"""The kinds of devices, as stored in a compiled network."""
+
+	SWITCH = 0
+	END_SYSTEM = 1
+
+
+@dataclass(frozen=True)
+class CompiledNetwork:
+	"""
+	A class used to represent a network as dense integer-indexed arrays, for the simulation hot path
+
+	Devices are identified by their index, and links by their position in the CSR (compressed sparse row) arrays: the
+	links leaving the device `i` are the ones from `offsets[i]` to `offsets[i + 1]`.
+
+	...
+
+	Attributes
+	----------
+	devices : list[Device]
+		the devices, by index
+	kinds : array
+		the kind of each device, by index
+	offsets : array
+		the position of the first link leaving each device, followed by the number of links
+	targets : array
+		the index of the device each link goes to
+	speeds : array
+		the speed of each link, in bytes per microsecond
+	gcls : list[Optional[GateControlList]]
+		the gate control list of each link, if any
+	ports : list[Port]
+		the output port of each link, scheduled independently by the simulation
+	policies : list[EgressPolicy]
+		the distinct policies of the switches overriding the policy of the run, whose keys the framelets hold
+	incoming : list[list[int]]
+		the links arriving at each device, by index
+
+	Methods
+	-------
+	link(src, dest)
+		Returns the index of the link between two devices
+	source(link)
+		Returns the index of the device a link leaves
+	"""
+
+	devices: list[Device]
+	kinds: array
+	offsets: array
+	targets: array
+	speeds: array
+	gcls: list[Optional[GateControlList]]
+	ports: list[Port]
+	policies: list[EgressPolicy]
+	incoming: list[list[int]]
+
+	def link(self: CompiledNetwork, src: int, dest: int) -> int:
+		"""Returns the index of the link between two devices, given by index."""
+
+		for link in range(self.offsets[src], self.offsets[src + 1]):
+			if self.targets[link] == dest:
+				return link
+
+		raise KeyError(f"No link from {self.devices[src].name} to {self.devices[dest].name}")
+
+	def source(self: CompiledNetwork, link: int) -> int:
+		"""Returns the index of the device a link, given by index, leaves."""
+
+		return bisect(self.offsets, link) - 1
+
+
+def compile_network(network: DiGraph, streams: set[Stream]) -> CompiledNetwork:
+	"""Compiles a network into integer-indexed arrays, and the routes of the streams into lists of link indices.
+	The devices are given an output port per link.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph whose devices have been indexed in insertion order
+	streams : set[Stream]
+		a set of routed streams, whose paths are set
+
+	Returns
+	-------
+	CompiledNetwork
+		the compiled network
+	"""
+
+	devices = sorted(network.nodes, key=lambda device: device.index)
+	offsets, targets, speeds, gcls, ports = array("l", [0]), array("l"), array("d"), [], []
+	policies: dict[str, int] = {}
+
+	for device in devices:
+		device.ports = []
+
+		if device.policy is not None:
+			device.policy_index = policies.setdefault(device.policy.name, len(policies))
+
+		for _, dest, data in sorted(network.out_edges(device, data=True), key=lambda edge: edge[1].index):
+			device.ports.append(Port(device, len(targets)))
+			targets.append(dest.index)
+			speeds.append(data["speed"])
+			gcls.append(data.get("gcl"))
+
+		ports.extend(device.ports)
+
+		offsets.append(len(targets))
+
+	compiled = CompiledNetwork(
+		devices,
+		array("B", (DeviceKind.END_SYSTEM if isinstance(device, EndSystem) else DeviceKind.SWITCH for device in devices)),
+		offsets,
+		targets,
+		speeds,
+		gcls,
+		ports,
+		[
+			next(device.policy for device in devices if device.policy is not None and device.policy.name == name)
+			for name in policies
+		],
+		[[link for link, target in enumerate(targets) if target == device.index] for device in devices],
+	)
+
+	for stream in streams:
+		stream.paths = [[compiled.link(u.index, v.index) for u, v in zip(route, route[1:])] for route in stream.routes]
+
+	return compiled
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import combinations, repeat
+from typing import Any, Optional
+
+from compiled import CompiledNetwork, DeviceKind
+
+from model import Solution
+
+from session import Session, share, shared
+
+
+@dataclass(frozen=True)
+class Failure:
+	"""
+	A class used to represent a failure scenario, as the links that fail at a given time
+
+	...
+
+	Attributes
+	----------
+	name : str
+		the failed elements, as link ("SW1-SW2") and switch names
+	links : frozenset[int]
+		the indices of the failed links in the compiled network, both directions of a failed link and all the links of a
+		failed switch
+	time : float
+		the simulated time the links fail at
+	"""
+
+	name: str
+	links: frozenset[int]
+	time: float = 0.0
+
+
+@dataclass(frozen=True)
+class Outcome:
+	"""
+	A class used to represent the results of a simulation under a failure scenario
+
+	...
+
+	Attributes
+	----------
+	name : str
+		the name of the scenario
+	misses : frozenset[str]
+		the ids of the streams with an instance delivered late or lost
+	lost : int
+		the number of instances with a framelet delivered by none of the routes before the deadline, or whose every
+		replica of a framelet has been dropped, even if the deadline falls after the end of the simulation
+	dropped : int
+		the number of framelets dropped at the failed links
+	wctts : dict[str, float]
+		the WCTT of each stream, up to the first delivery of each framelet
+	"""
+
+	name: str
+	misses: frozenset[str]
+	lost: int
+	dropped: int
+	wctts: dict[str, float]
+
+
+def scenarios(network: CompiledNetwork, order: int = 1, time: float = 0.0) -> list[Failure]:
+	"""Enumerates the failure scenarios of a network, from single link or switch failures up to a number of simultaneous
+	ones. A link fails in both directions, and a switch fails with all its links.
+
+	Parameters
+	----------
+	network : CompiledNetwork
+		a compiled network
+	order : int
+		the maximum number of elements failing together
+	time : float
+		the simulated time the elements fail at
+
+	Returns
+	-------
+	list[Failure]
+		the failure scenarios, single failures first
+	"""
+
+	elements: list[tuple[str, frozenset[int]]] = []
+	pairs: dict[frozenset[int], set[int]] = {}
+
+	for link, target in enumerate(network.targets):
+		pairs.setdefault(frozenset((network.source(link), target)), set()).add(link)
+
+	for pair, links in pairs.items():
+		elements.append(("-".join(sorted(network.devices[device].name for device in pair)), frozenset(links)))
+
+	for index, kind in enumerate(network.kinds):
+		if kind == DeviceKind.SWITCH:
+			elements.append((network.devices[index].name, frozenset().union(*(
+				links for pair, links in pairs.items() if index in pair
+			))))
+
+	elements.sort()
+
+	return [
+		Failure(" + ".join(name for name, _ in failed), frozenset().union(*(links for _, links in failed)), time)
+		for count in range(1, order + 1)
+		for failed in combinations(elements, count)
+	]
+
+
+def _outcome(name: str, results: Solution, simulator_age: float) -> Outcome:
+	lost = results.overdue(simulator_age)
+	late = {stream.id for missed in results.misses.values() for stream in missed}
+
+	return Outcome(
+		name,
+		frozenset(late | {id for id, count in lost.items() if count}),
+		sum(lost.values()),
+		sum(counters.dropped for counters in results.counters.values()),
+		results.wctts,
+	)
+
+
+def _evaluate(failure: Failure, options: dict[str, Any]) -> Outcome:
+	results, simulator_age = shared().run(**options, failure=failure)
+
+	return _outcome(failure.name, results, simulator_age)
+
+
+def analyze(session: Session, options: dict[str, Any], order: int = 1, time: Optional[float] = None,
+	workers: Optional[int] = None) -> tuple[Outcome, list[Outcome]]:
+	"""Simulates a model without failure, then under each failure scenario, in a pool of processes sharing the model.
+
+	Parameters
+	----------
+	session : Session
+		the model
+	options : dict[str, Any]
+		the keyword arguments of the runs of the model. The replicas are eliminated at the receivers unless
+		`elimination` is given, so that the WCTT is the latency of the first delivery of the framelets.
+	order : int
+		the maximum number of elements failing together
+	time : Optional[float]
+		the simulated time the elements fail at. If None, halfway between the first release of the streams and the first
+		complete delivery of one of its instances without failure, so that the failures hit the traffic of the release.
+	workers : Optional[int]
+		the number of processes, or the number of processors if None. The scenarios are simulated in this process if 1.
+
+	Returns
+	-------
+	tuple[Outcome, list[Outcome]]
+		the outcome of the simulation without failure, and the outcome of each scenario
+	"""
+
+	options = {**options, "elimination": options.get("elimination") or "receiver"}
+	results, simulator_age = session.run(**options)
+	baseline = _outcome("none", results, simulator_age)
+
+	if time is None:
+		first = min(session.stream_emissions, default=0.0)
+		time = first + min(
+			(
+				instance.latency for instances in results.instances.values() for instance in instances
+				if instance.release_time == first and instance.complete()
+			),
+			default=0.0,
+		) / 2
+
+	failures = scenarios(session.compiled, order, time)
+
+	if workers == 1:
+		share(session)
+
+		return baseline, [_evaluate(failure, options) for failure in failures]
+
+	with session.pool(workers) as executor:
+		return baseline, list(executor.map(_evaluate, failures, repeat(options), chunksize=4))
+
+
+def report(baseline: Outcome, outcomes: list[Outcome]) -> str:
+	"""Compares the deadline misses and the WCTT of the streams under each failure scenario with the simulation without
+	failure, the most severe scenarios first.
+
+	Parameters
+	----------
+	baseline : Outcome
+		The outcome of the simulation without failure.
+	outcomes : list[Outcome]
+		The outcome of each failure scenario.
+
+	Returns
+	-------
+	str
+		A table holding the misses, the lost instances, the dropped framelets and the largest WCTT increase of each
+		scenario, with a warning if no scenario dropped a framelet.
+	"""
+
+	def degradation(outcome: Outcome) -> tuple[float, str]:
+		return max(
+			((wctt - baseline.wctts[id], id) for id, wctt in outcome.wctts.items() if id in baseline.wctts),
+			default=(0.0, "-"),
+		)
+
+	width = max((len(outcome.name) for outcome in outcomes), default=8) + 2
+	lines = [f"{'scenario':<{width}}{'missed':>8}{'lost':>8}{'dropped':>10}{'WCTT increase':>16}  stream"]
+
+	for outcome in sorted(
+		[baseline] + outcomes,
+		key=lambda outcome: (-len(outcome.misses), -outcome.lost, -degradation(outcome)[0], outcome.name),
+	):
+		increase, stream = degradation(outcome)
+		lines.append(
+			f"{outcome.name:<{width}}{len(outcome.misses):>8}{outcome.lost:>8}{outcome.dropped:>10}{increase:>16.2f}  "
+			f"{stream if increase > 0 else '-'}"
+		)
+
+	tolerated = sum(1 for outcome in outcomes if len(outcome.misses) <= len(baseline.misses))
+	lines.append(f"scenarios without additional missed streams: {tolerated}/{len(outcomes)}")
+
+	if outcomes and not any(outcome.dropped for outcome in outcomes):
+		lines.append("warning: no framelet was dropped in any scenario, the failures may happen after the traffic")
+
+	return "\n".join(lines)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from compiled import CompiledNetwork
+
+from model import Device, Solution, Stream
+
+MODES = ("receiver", "merge")
+
+
+def merge_points(stream: Stream) -> set[Device]:
+	"""Returns the switches where routes of a stream merge, that is the devices other than its source and destination
+	that are on more than one of its routes."""
+
+	seen: set[Device] = set()
+	merges: set[Device] = set()
+
+	for route in stream.routes:
+		for device in route[1:-1]:
+			(merges if device in seen else seen).add(device)
+
+	return merges
+
+
+def configure(network: CompiledNetwork, streams: set[Stream], elimination: Optional[str]) -> None:
+	"""Sets the streams whose replicas the devices of a network eliminate (802.1CB), by sequence number.
+
+	Parameters
+	----------
+	network : CompiledNetwork
+		a compiled network
+	streams : set[Stream]
+		a set of routed streams
+	elimination : Optional[str]
+		"receiver" to eliminate replicas at the destination of the streams, "merge" to also eliminate them at the switches
+		where their routes merge, or None to deliver every replica
+	"""
+
+	for device in network.devices:
+		device.recovery.clear()
+
+	if elimination is None:
+		return
+
+	for stream in streams:
+		if len(stream.routes) < 2:
+			continue
+
+		stream.dest.recovery.add(stream)
+
+		if elimination == "merge":
+			for device in merge_points(stream):
+				device.recovery.add(stream)
+
+
+def report(replicated: Solution, eliminated: Solution) -> str:
+	"""Compares the latency of the redundant streams between a simulation delivering every replica of their framelets and
+	one eliminating the replicas, and sums up the replicas eliminated and the traffic saved.
+
+	Parameters
+	----------
+	replicated : Solution
+		The results of a simulation without elimination.
+	eliminated : Solution
+		The results of a simulation of the same model with elimination.
+
+	Returns
+	-------
+	str
+		A table holding the WCTT of each redundant stream in both simulations, followed by the eliminations.
+	"""
+
+	lines = [f"{'stream':<12}{'WCTT':>12}{'first delivery WCTT':>22}"]
+
+	redundant = sorted(
+		(stream for stream in eliminated.streams if len(stream.routes) > 1), key=lambda stream: stream.id
+	)
+
+	for stream in redundant:
+		lines.append(f"{stream.id:<12}{replicated.wctts[stream.id]:>12.2f}{eliminated.wctts[stream.id]:>22.2f}")
+
+	counters = eliminated.counters.values()
+	at_destinations = sum(eliminated.counters[name].eliminated for name in {stream.dest.name for stream in redundant})
+	at_merges = sum(device.eliminated for device in counters) - at_destinations
+	saved = sum(device.saved for device in counters)
+	transmitted = sum(device.transmitted for device in counters)
+
+	lines.append(f"{at_destinations} replicas eliminated at destinations, {at_merges} at merge points")
+	lines.append(
+		f"{saved} bytes of link traffic saved, out of {saved + transmitted} "
+		f"({saved / (saved + transmitted) * 100 if saved + transmitted else 0.0:.2f}%)"
+	)
+	lines.append(f"deadline misses: {len(replicated.misses)} without elimination, {len(eliminated.misses)} with")
+
+	return "\n".join(lines)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import repeat
+from math import inf
+from os import cpu_count
+from typing import Any, Optional
+
+import routing
+
+from session import Session, share, shared
+
+
+@dataclass(frozen=True)
+class Headroom:
+	"""
+	A class used to represent the schedulability headroom of a model, as the factors its stream sizes can be scaled by
+
+	...
+
+	Attributes
+	----------
+	factor : float
+		the largest factor found at which no stream misses a deadline
+	bound : float
+		the factor from which a link is overloaded, beyond which the search does not go
+	passed : dict[str, float]
+		the largest factor found at which each stream, by id, does not miss a deadline
+	failed : dict[str, float]
+		the smallest factor found at which each stream, by id, misses a deadline, or infinity if it did not up to the bound
+	"""
+
+	factor: float
+	bound: float
+	passed: dict[str, float]
+	failed: dict[str, float]
+
+
+def utilization_bound(session: Session) -> float:
+	"""Returns the factor by which the stream sizes can be scaled before the bandwidth of the streams exceeds the speed of
+	a link, a necessary condition for no deadline to be missed.
+
+	Parameters
+	----------
+	session : Session
+		a model
+
+	Returns
+	-------
+	float
+		the factor, or infinity if no stream is routed
+	"""
+
+	load = max(routing.utilization(session.network, session.streams).values(), default=0.0)
+
+	return 1 / load if load > 0 else inf
+
+
+def _probe(factor: float, options: dict[str, Any]) -> tuple[float, frozenset[str]]:
+	"""Simulates the shared model with the stream sizes scaled by a factor, and returns the ids of the streams that
+	missed a deadline, by a late delivery or an instance still not delivered at the end of the simulation."""
+
+	results, simulator_age = shared().run(**options, scale=factor)
+
+	return factor, frozenset(
+		{stream.id for missed in results.misses.values() for stream in missed}
+		| {id for id, count in results.overdue(simulator_age).items() if count}
+	)
+
+
+def search(session: Session, options: dict[str, Any], tolerance: float = 0.01, rounds: int = 16,
+	workers: Optional[int] = None) -> Headroom:
+	"""Searches for the critical scaling factor of the stream sizes of each stream, at which it starts missing
+	deadlines, assuming that scaling up never removes a miss. The factors are searched together between zero and the
+	utilization bound: each round splits the distinct intervals of the streams not found within the tolerance yet into
+	equal parts, with as many points per interval as keep the processes busy, and simulates the points in a pool of
+	processes sharing the model. With one process, this is a bisection.
+
+	Parameters
+	----------
+	session : Session
+		the model, whose topology and routes are reused by every simulation
+	options : dict[str, Any]
+		the keyword arguments of the runs of the model
+	tolerance : float
+		the width of the interval of the critical factor of a stream below which it is found, relative to its upper end
+	rounds : int
+		the maximum number of rounds
+	workers : Optional[int]
+		the number of processes, or the number of processors if None. The factors are simulated in this process if 1.
+
+	Returns
+	-------
+	Headroom
+		the critical factors found
+	"""
+
+	bound = utilization_bound(session)
+	upper = bound if bound < inf else 1.0
+	passed = {stream.id: 0.0 for stream in session.streams}
+	failed = {stream.id: inf for stream in session.streams}
+
+	executor = None if workers == 1 else session.pool(workers)
+	processes = 1 if executor is None else workers or cpu_count() or 1
+
+	if executor is None:
+		share(session)
+
+	try:
+		points = [upper]
+
+		for _ in range(rounds):
+			probes = map(_probe, points, repeat(options)) if executor is None \
+				else executor.map(_probe, points, repeat(options))
+
+			for factor, misses in probes:
+				for id in passed:
+					if id in misses:
+						failed[id] = min(failed[id], factor)
+					elif factor < failed[id]:
+						passed[id] = max(passed[id], factor)
+
+			intervals = {
+				(passed[id], min(failed[id], upper))
+				for id in passed
+				if passed[id] < upper and min(failed[id], upper) - passed[id] > tolerance * min(failed[id], upper)
+			}
+			parts = max(2, processes // len(intervals) + 1) if intervals else 2
+			points = sorted({low + (high - low) * i / parts for low, high in intervals for i in range(1, parts)})
+
+			if not points:
+				break
+	finally:
+		if executor is not None:
+			executor.shutdown()
+
+	return Headroom(min(passed.values(), default=upper), bound, passed, failed)
+
+
+def report(headroom: Headroom) -> str:
+	"""Lists the critical scaling factor of each stream, the most critical first.
+
+	Parameters
+	----------
+	headroom : Headroom
+		The critical factors found.
+
+	Returns
+	-------
+	str
+		A table holding the interval of the critical factor of each stream, followed by the headroom of the model.
+	"""
+
+	lines = [f"{'stream':<12}{'passed':>10}{'missed':>10}"]
+
+	for id in sorted(headroom.passed, key=lambda id: (headroom.failed[id], headroom.passed[id], id)):
+		missed = f"{headroom.failed[id]:>10.3f}" if headroom.failed[id] < inf else f"{'-':>10}"
+		lines.append(f"{id:<12}{headroom.passed[id]:>10.3f}{missed}")
+
+	lines.append(f"stream sizes can be scaled by {headroom.factor:.3f} without missing a deadline")
+	lines.append(f"utilization bound: {headroom.bound:.3f}")
+
+	return "\n".join(lines)
@@ -1,16 +1,33 @@
 from argparse import ArgumentParser
+from concurrent.futures import Future, ProcessPoolExecutor
 from logging import INFO, WARNING, getLogger
 from pathlib import Path
 
-from builder import build
+import accounting
 
-from matplotlib import pyplot  # type: ignore
+from networkx import DiGraph  # type: ignore
 
-from networkx import DiGraph, draw, spring_layout  # type: ignore
+import faults
+
+import frer
+
+import headroom
 
 from output import to_file
 
-from simulator import simulate
+from policy import POLICIES
+
+import preemption
+
+import rendering
+
+import routing
+
+from session import Session
+
+import tas
+
+import tracing
 
 from cProfile import run
 
@@ -66,16 +83,147 @@ def _create_cli_parser() -> ArgumentParser:
 		help="Display network as graph",
 		dest="display_graph",
 	)
+	parser.add_argument(
+		"--graph",
+		type=Path,
+		help="Render the network into an image FILE, PNG or SVG depending on its suffix, without any display.",
+		metavar="FILE",
+		dest="graph",
+	)
+	parser.add_argument(
+		"--gantt",
+		type=Path,
+		help="Render the occupancy of each link into an image FILE, PNG or SVG depending on its suffix, from the \
+			event trace, recorded into FILE with a '.bin' suffix unless '--trace' is given.",
+		metavar="FILE",
+		dest="gantt",
+	)
+	parser.add_argument(
+		"-p", "--policy",
+		choices=POLICIES,
+		default="redundancy",
+		help="The egress scheduling policy of the devices, unless overridden by a switch (default: %(default)s).",
+		dest="policy",
+	)
+	parser.add_argument(
+		"-r", "--routing",
+		choices=("greedy", "balanced"),
+		default="greedy",
+		help="The route selection: the first node-disjoint routes of each stream, or routes balancing the link \
+			utilization of all the streams, compared with the former (default: %(default)s).",
+		dest="routing",
+	)
+	parser.add_argument(
+		"--synthesize-gcl",
+		action="store_true",
+		help="Synthesize a no-wait gate control list schedule of the streams, and compare its latency and jitter with \
+			an ungated simulation.",
+		dest="synthesize_gcl",
+	)
+	parser.add_argument(
+		"--framelet-size",
+		type=int,
+		default=64,
+		help="The maximum size of the framelets the stream instances are split into, in bytes (default: %(default)s).",
+		metavar="BYTES",
+		dest="framelet_size",
+	)
+	parser.add_argument(
+		"--preemption",
+		action="store_true",
+		help="Let express streams preempt the transmission of other streams (802.1Qbu), and compare with a simulation \
+			without preemption. Preemption requires framelets of at least 128 bytes.",
+		dest="preemption",
+	)
+	parser.add_argument(
+		"--frer",
+		choices=frer.MODES,
+		help="Eliminate the replicas of the framelets of redundant streams by sequence number (802.1CB), at their \
+			destination or also where their routes merge, and compare with a simulation delivering every replica.",
+		dest="frer",
+	)
+	parser.add_argument(
+		"--faults",
+		type=int,
+		choices=(1, 2),
+		help="Simulate every failure scenario of up to N links or switches failing together in the middle of the \
+			simulation, and compare their deadline misses and WCTT with a simulation without failure.",
+		metavar="N",
+		dest="faults",
+	)
+	parser.add_argument(
+		"--fault-time",
+		type=float,
+		help="The simulated time the links or switches fail at, in microseconds (default: halfway through the delivery \
+			of the first stream release).",
+		metavar="TIME",
+		dest="fault_time",
+	)
+	parser.add_argument(
+		"--headroom",
+		action="store_true",
+		help="Search for the factor by which the sizes of the streams can be scaled before each of them misses a \
+			deadline, up to the utilization bound.",
+		dest="headroom",
+	)
+	parser.add_argument(
+		"--headroom-tolerance",
+		type=float,
+		default=0.01,
+		help="The relative precision of the scaling factors searched (default: %(default)s).",
+		metavar="RATIO",
+		dest="headroom_tolerance",
+	)
+	parser.add_argument(
+		"--workers",
+		type=int,
+		help="The number of processes simulating the failure scenarios or the scaled streams (default: the number of \
+			processors).",
+		metavar="N",
+		dest="workers",
+	)
+	parser.add_argument(
+		"--trace",
+		type=Path,
+		help="Record a binary event trace of the simulation into FILE, to be read with 'src/tracing.py'.",
+		metavar="FILE",
+		dest="trace",
+	)
+	parser.add_argument(
+		"--trace-capacity",
+		type=int,
+		default=1 << 20,
+		help="The number of most recent events kept in the trace (default: %(default)s).",
+		metavar="EVENTS",
+		dest="trace_capacity",
+	)
+	parser.add_argument(
+		"--accounting",
+		action="store_true",
+		help="Write the wall time of each phase and the simulation throughput into a JSON file beside the results.",
+		dest="accounting",
+	)
+	parser.add_argument(
+		"--accounting-memory",
+		type=int,
+		nargs="?",
+		const=10,
+		help="Also trace the memory allocations, and report their peak and the top N allocation sites (default: \
+			%(const)s). Tracing slows the program down.",
+		metavar="N",
+		dest="accounting_memory",
+	)
 	parser.add_argument("--version", action="version", version="%(prog)s 0.1.0")
 
 	return parser
 
 
 def display_graph(network: DiGraph) -> None:
-	pos = spring_layout(network, k=3 / (len(network.nodes()) ** 0.5), iterations=50)
-	pyplot.subplots(figsize=(30, 30))
-	pyplot.subplot(121)
-	draw(network, pos=pos, connectionstyle='arc3, rad = 0.1')
+	from matplotlib import pyplot  # type: ignore
+
+	devices, links = rendering.describe(network)
+	_, axes = pyplot.subplots(figsize=rendering.figure_size(len(devices)))
+	rendering.draw_topology(devices, links, axes)
 	pyplot.show()
 
 
@@ -84,18 +232,92 @@ def main() -> int:
 
 	getLogger().setLevel(INFO if args.verbose else WARNING)
 
-	network, streams, stream_emissions, emitters, receivers, hyperperiod = build(args.file)
+	if args.accounting or args.accounting_memory is not None:
+		accounting.enable(args.accounting_memory is not None, args.accounting_memory or 0)
+
+	session = Session(args.file, args.routing)
+	options = {
+		"time_limit": args.time,
+		"stop_on_miss": args.stop,
+		"policy": POLICIES[args.policy](),
+		"framelet_size": args.framelet_size,
+		"elimination": args.frer,
+	}
+
+	# Images are rendered by another process from plain data, while simulating
+	renderer = ProcessPoolExecutor(1) if args.graph is not None or args.gantt is not None else None
+	renders: list[Future] = []
+	trace = args.gantt.with_suffix(".bin") if args.trace is None and args.gantt is not None else args.trace
+
+	if args.graph is not None:
+		renders.append(renderer.submit(rendering.render_topology, *rendering.describe(session.network), args.graph))
 
 	if args.display_graph:
-		display_graph(network)
+		display_graph(session.network)
+
+	if args.routing == "balanced":
+		print(routing.report(session.network, session.streams))
+
+	if args.faults is not None:
+		with accounting.phase("faults"):
+			print(faults.report(*faults.analyze(
+				session, {**options, "preemption": args.preemption}, args.faults, args.fault_time, args.workers
+			)))
+
+	if args.headroom:
+		with accounting.phase("headroom"):
+			print(headroom.report(headroom.search(
+				session, {**options, "preemption": args.preemption}, args.headroom_tolerance, workers=args.workers
+			)))
+
+	if args.synthesize_gcl:
+		ungated, _ = session.run(**options, preemption=args.preemption)
+		scheduled = session.synthesize(args.framelet_size)
+
+	if args.preemption:
+		baseline, _ = session.run(**options, preemption=False)
+
+	if args.frer is not None:
+		replicated, _ = session.run(**{**options, "elimination": None}, preemption=args.preemption)
 
-	results, simulator_age = simulate(network, streams, stream_emissions, emitters, receivers, args.time, args.stop, hyperperiod)
+	if trace is not None:
+		tracing.enable(args.trace_capacity)
+
+	results, simulator_age = session.run(**options, preemption=args.preemption)
+
+	if args.synthesize_gcl:
+		print(tas.report(ungated, results, scheduled))
+
+	if args.preemption:
+		print(preemption.report(baseline, results))
+
+	if args.frer is not None:
+		print(frer.report(replicated, results))
 
 	results.monetaryCost()
 	results.redundancySatisfiedRatio()
 	print("Simulated network traffic for {} microseconds".format(simulator_age))
 
-	to_file(results, args.file)
+	with accounting.phase("output"):
+		filepath = to_file(results, args.file)
+
+	if accounting.accountant is not None:
+		accounting.accountant.labels.update(model=str(args.file), results=str(filepath))
+		print(f"Resource accounting written into '{accounting.accountant.save(filepath.with_suffix('.json'))}'")
+		accounting.disable()
+
+	if tracing.tracer is not None:
+		tracing.tracer.save(trace)
+		tracing.disable()
+
+	if args.gantt is not None:
+		renders.append(renderer.submit(rendering.render_occupancy, trace, args.gantt))
+
+	if renderer is not None:
+		for render in renders:
+			print(f"Rendered '{render.result()}'")
+
+		renderer.shutdown()
 
 	return 0
 
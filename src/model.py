@@ -1,72 +1,396 @@
 from __future__ import annotations
 
-import logging
 from collections.abc import Sequence
 from dataclasses import dataclass, field
 from functools import total_ordering
+from heapq import heappop, heappush
 from itertools import combinations, chain
-from queue import PriorityQueue
-from typing import overload
+from math import inf
+from typing import Optional, TYPE_CHECKING, overload
 
 from networkx import DiGraph  # type: ignore
 
-@total_ordering
+from policy import EgressPolicy, RedundancyFirst, next_sequence
+
+import tracing
+from tracing import EventKind
+
+if TYPE_CHECKING:
+	from compiled import CompiledNetwork
+
+# Sizes in bytes. Frames shorter than the minimum are padded, and a preemptable frame can only be split into fragments
+# of at least the minimum fragment size, each continuation fragment adding a preamble and the previous one an mCRC.
+MIN_FRAME_SIZE = 64
+MIN_FRAGMENT_SIZE = 64
+FRAGMENT_OVERHEAD = 8 + 4
+
+
+@dataclass
+class Transmission:
+	"""
+	A class used to represent the ongoing transmission of a preemptable framelet (802.3br)
+
+	...
+
+	Attributes
+	----------
+	framelet : Framelet
+		the framelet being transmitted
+	link : int
+		the index of the link the framelet is transmitted on
+	sent : int
+		the number of bytes of the framelet sent so far
+	resumed : bool
+		whether the transmission has just been preempted, and the next fragment bears the fragment overhead
+	"""
+
+	framelet: Framelet
+	link: int
+	sent: int = 0
+	resumed: bool = False
+
+	def remaining(self: Transmission) -> int:
+		return max(self.framelet.size, MIN_FRAME_SIZE) - self.sent
+
+	def preemptable(self: Transmission) -> bool:
+		"""Returns whether both the fragment sent so far and the remainder are large enough to split the framelet."""
+
+		return self.sent >= MIN_FRAGMENT_SIZE and self.remaining() >= MIN_FRAGMENT_SIZE
+
+
+@dataclass(eq=False)
+class Port:
+	"""
+	A class used to represent an output port of a device, transmitting on one link independently of the other ports
+
+	...
+
+	Attributes
+	----------
+	device : Device
+		the device the port belongs to
+	link : int
+		the index of the link the port transmits on, in a compiled network
+	egress : list[tuple[int, Framelet]]
+		the queue of the framelets to transmit, as a heap
+	express : list[tuple[int, Framelet]]
+		the queue of the framelets of express streams, served first, as a heap
+	transmission : Optional[Transmission]
+		the ongoing transmission of a preemptable framelet, if any
+	localTime : float
+		the time up to which the port has transmitted
+	down : bool
+		whether the link has failed, the port dropping its framelets
+	"""
+
+	device: Device
+	link: int
+	egress: list[tuple[int, Framelet]] = field(default_factory=list)
+	express: list[tuple[int, Framelet]] = field(default_factory=list)
+	transmission: Optional[Transmission] = None
+	localTime: float = 0.0
+	down: bool = False
+
+	def reset(self: Port) -> None:
+		"""Clears the simulation state of the port."""
+
+		self.egress.clear()
+		self.express.clear()
+		self.transmission = None
+		self.localTime = 0.0
+		self.down = False
+
+	def _dequeue(self: Port, queue: list[tuple[int, Framelet]], network: CompiledNetwork) \
+		-> tuple[Optional[Framelet], float]:
+		"""Pops the first framelet of a queue whose gate is open until the end of its transmission. Framelets are
+		dropped if the link failed.
+
+		Parameters
+		----------
+		queue : list[tuple[int, Framelet]]
+			An egress queue of the port.
+		network : CompiledNetwork
+			The network the port belongs to.
+
+		Returns
+		-------
+		tuple[Optional[Framelet], float]
+			The framelet to send if any, and the time until the gate of a held framelet opens.
+		"""
+
+		if self.down:
+			while queue:
+				self._drop(heappop(queue)[1])
+
+			return None, inf
+
+		gcl = network.gcls[self.link]
+
+		if gcl is None:
+			return (heappop(queue)[1] if queue else None), inf
+
+		held: list[tuple[int, Framelet]] = []  # Framelets whose gate is closed
+		selected = None
+		wait = inf
+
+		while queue:
+			key, frame = heappop(queue)
+			duration = max(frame.size, MIN_FRAME_SIZE) / network.speeds[self.link]
+
+			if not gcl.admits(self.localTime, frame.instance.stream.priority, duration):
+				held.append((key, frame))
+				wait = min(wait, gcl.next_open(self.localTime, frame.instance.stream.priority, duration) - self.localTime)
+				continue
+
+			selected = frame
+			break
+
+		for item in held:
+			heappush(queue, item)
+
+		return selected, wait
+
+	def _drop(self: Port, frame: Framelet) -> None:
+		"""Drops a framelet lost with the link."""
+
+		self.device.dropped += 1
+		frame.instance.discarded[frame.id] = frame.instance.discarded.get(frame.id, 0) + 1
+
+		if tracing.tracer is not None:
+			tracing.tracer.record(EventKind.DROP, self.localTime, 0.0, self.device, None, frame)
+
+	def _next_arrival(self: Port, network: CompiledNetwork, release: float) -> float:
+		"""Returns the earliest time a framelet may be queued on the port: the arrival of the framelets being received by
+		the device, the end of a minimum frame after the current time of the ports sending to the device, or the next
+		release of the streams for an end system."""
+
+		device = self.device
+		earliest = min((framelet.localTime for framelet in device.ingress), default=inf)
+
+		for link in network.incoming[device.index]:
+			earliest = min(earliest, network.ports[link].localTime + MIN_FRAME_SIZE / network.speeds[link])
+
+		return min(earliest, release) if isinstance(device, EndSystem) else earliest
+
+	def _send(self: Port, frame: Framelet, size: int, network: CompiledNetwork, last: bool = True) -> None:
+		"""Transmits bytes of a framelet, and hands the framelet to the next device if they are the last ones."""
+
+		duration = size / network.speeds[self.link]
+		nextStep = network.devices[network.targets[self.link]]
+
+		if tracing.tracer is not None:
+			tracing.tracer.record(EventKind.EMIT, self.localTime, duration, self.device, nextStep, frame)
+
+		# advance time for this port and the frame sent
+		self.localTime += duration
+		self.device.transmitted += size
+		self.device.emissions += 1
+
+		if last:
+			frame.hop += 1
+			frame.localTime = self.localTime
+			nextStep.ingress.append(frame) # Send framelet
+
+	# We advance time by the guard band at most, and no further than the next framelet may be queued, so that it is sent
+	# as soon as it arrives
+	def emit(self: Port, network: CompiledNetwork, preemption: bool = False, release: float = inf) -> None:
+		wait = MIN_FRAME_SIZE / network.speeds[self.link]
+
+		# The rest of an ongoing transmission is lost with the link
+		if self.down and self.transmission is not None:
+			self._drop(self.transmission.framelet)
+			self.transmission = None
+
+		# Express framelets go first, and preempt the ongoing transmission if possible
+		if self.transmission is None or (preemption and self.express and self.transmission.preemptable()):
+			for queue in (self.express, self.egress) if self.transmission is None else (self.express, ):
+				if not queue:
+					continue
+
+				frame, gated = self._dequeue(queue, network)
+				wait = min(wait, gated)
+
+				if frame is None:
+					continue
+
+				size = max(frame.size, MIN_FRAME_SIZE)
+
+				if preemption and queue is self.egress and size >= 2 * MIN_FRAGMENT_SIZE:
+					self.transmission = Transmission(frame, self.link)
+					break
+
+				if self.transmission is not None and not self.transmission.resumed:
+					self.transmission.resumed = True
+					self.device.preemptions += 1
+
+				self._send(frame, size, network)
+				return
+
+		if (transmission := self.transmission) is not None:
+			# Send the next fragment, so that the transmission can be preempted at its end
+			remaining = transmission.remaining()
+			size = remaining if remaining < 2 * MIN_FRAGMENT_SIZE else MIN_FRAGMENT_SIZE
+			overhead = FRAGMENT_OVERHEAD if transmission.resumed else 0
+			gcl = network.gcls[self.link]
+			tc = transmission.framelet.instance.stream.priority
+			duration = (size + overhead) / network.speeds[self.link]
+
+			# A fragment is held while its gate is closed, as a preemption may have delayed it past the window
+			if gcl is None or gcl.admits(self.localTime, tc, duration):
+				transmission.sent += size
+				transmission.resumed = False
+				self.device.overhead += overhead
+
+				if transmission.remaining() == 0:
+					self.transmission = None
+
+				self._send(transmission.framelet, size + overhead, network, self.transmission is None)
+				return
+
+			wait = min(wait, gcl.next_open(self.localTime, tc, duration) - self.localTime)
+
+		self.localTime = min(self.localTime + wait, self._next_arrival(network, release))
+
+
+@dataclass(frozen=True)
+class DeviceCounters:
+	"""
+	A class used to represent the counters of a device at the end of a run
+
+	...
+
+	Attributes
+	----------
+	preemptions : int
+		the number of transmissions preempted by express framelets
+	overhead : int
+		the number of bytes of fragment overhead transmitted
+	transmitted : int
+		the number of bytes transmitted
+	dropped : int
+		the number of framelets dropped at failed links
+	eliminated : int
+		the number of replicas of framelets eliminated (802.1CB)
+	saved : int
+		the number of bytes of link traffic saved by eliminating replicas
+	emissions : int
+		the number of transmissions of framelets or fragments
+	"""
+
+	preemptions: int = 0
+	overhead: int = 0
+	transmitted: int = 0
+	dropped: int = 0
+	eliminated: int = 0
+	saved: int = 0
+	emissions: int = 0
+
+
 @dataclass
 class Device:
 	name: str
 	ingress: list[Framelet] = field(default_factory=list)
-	egress: PriorityQueue[Framelet] = field(default_factory=PriorityQueue)
-	localTime: float = 0.0
+	policy: Optional[EgressPolicy] = None
+	ports: list[Port] = field(default_factory=list)  # By link, in the order of the links in the compiled network
+	preemptions: int = 0
+	overhead: int = 0
+	transmitted: int = 0
+	dropped: int = 0
+	recovery: set[Stream] = field(default_factory=set)  # Streams whose replicas are eliminated (802.1CB)
+	eliminated: int = 0
+	saved: int = 0
+	emissions: int = 0
+	index: int = -1  # Dense identifier of the device within its network
+	policy_index: int = -1  # Index of the policy among the policies of the switches of the network, if any
 
 	def __hash__(self: Device) -> int:
-		return hash(self.name)
+		return self.index
 
 	def __eq__(self: Device, other: object) -> bool:
 		if isinstance(other, Device):
-			return self.name == other.name
+			return self.index == other.index
 		else:
 			return NotImplemented
 
-	def __lt__(self, other):
-		if isinstance(other, Device):
-			return self.localTime < other.localTime
-		else:
-			RuntimeError(f"Mismatch between device {self=} and other {other=}")
-
-	# We always advance time by the guard band!
-	def emit(self, network: DiGraph) -> None:
-		if not self.egress.empty():
-			frame = self.egress.get()
-
-			nextStep = {}
-			# print(self.name)
-			for i, device in enumerate(frame.route):
-				# (f"\t{device.name}")
-				if device == self:
-					nextStep = frame.route[i + 1]
-					break
+	def reset(self: Device) -> None:
+		"""Clears the simulation state of the device and its ports, keeping its place in the network."""
 
-			speed = network.get_edge_data(self, nextStep)['speed']
+		self.ingress.clear()
 
-			# advance time for this device and the frame sent
-			self.localTime += 64.0 / speed
-			frame.localTime = self.localTime
-			nextStep.ingress.append(frame) # Send framelet
-		else:
-			self.localTime += 64 / 12.5
+		for port in self.ports:
+			port.reset()
+
+		self.preemptions = 0
+		self.overhead = 0
+		self.transmitted = 0
+		self.dropped = 0
+		self.recovery.clear()
+		self.eliminated = 0
+		self.saved = 0
+		self.emissions = 0
+
+	def counters(self: Device) -> DeviceCounters:
+		"""Returns the counters of the device, as they are at the time of the call."""
+
+		return DeviceCounters(
+			self.preemptions, self.overhead, self.transmitted, self.dropped, self.eliminated, self.saved,
+			self.emissions,
+		)
+
+	def enqueue(self: Device, framelet: Framelet) -> None:
+		"""Queues a framelet on the port of its next link, ordered by the key of the framelet for the device policy if
+		any, or for the policy of the run. Framelets of express streams go into the express queue of the port, served
+		first."""
+
+		# The links of a device are consecutive in a compiled network
+		port = self.ports[framelet.path[framelet.hop] - self.ports[0].link]
+		queue = port.express if framelet.instance.stream.express else port.egress
+		heappush(queue, (framelet.key if self.policy is None else framelet.keys[self.policy_index], framelet))
+
+	def _arrived(self: Device, time: float) -> list[Framelet]:
+		"""Removes the framelets that have arrived by a time from the ingress, and returns them in arrival order, so that
+		the first replica of a framelet to arrive is the one kept."""
 
-		logging.info(f"Swtich {self.name} emitted framelet")
+		self.ingress.sort(key=lambda framelet: framelet.localTime)
+		count = next((i for i, framelet in enumerate(self.ingress) if framelet.localTime > time), len(self.ingress))
+		arrived = self.ingress[:count]
+		del self.ingress[:count]
+
+		return arrived
+
+	def _eliminate(self: Device, framelet: Framelet, history: set, key: object) -> bool:
+		"""Returns whether a framelet is a replica of one already in the history of its instance, by sequence key,
+		counting it as eliminated if so."""
+
+		if key not in history:
+			history.add(key)
+			return False
+
+		framelet.instance.eliminated += 1
+		framelet.instance.discarded[framelet.id] = framelet.instance.discarded.get(framelet.id, 0) + 1
+		self.eliminated += 1
+		self.saved += (len(framelet.path) - framelet.hop) * max(framelet.size, MIN_FRAME_SIZE)
+
+		if tracing.tracer is not None:
+			tracing.tracer.record(EventKind.ELIMINATE, framelet.localTime, 0.0, self, None, framelet)
+
+		return True
 
 
 @dataclass(eq=False)
 class Switch(Device):
-	def receive(self: Switch) -> set[Stream]:
+	def receive(self: Switch, time: float) -> set[Stream]:
 		misses: set[Stream] = set()
 
-		for framelet in self.ingress:
-			logging.info(f"Switch {self.name} received framelet")
-			self.egress.put(framelet)  # Queue instead
-		self.ingress.clear()
+		for framelet in self._arrived(time):
+			if self.recovery and framelet.instance.stream in self.recovery \
+				and self._eliminate(framelet, framelet.instance.forwarded, (self.index, framelet.id)):
+				continue
+
+			if tracing.tracer is not None:
+				tracing.tracer.record(EventKind.RECEIVE, framelet.localTime, 0.0, self, None, framelet)
+
+			self.enqueue(framelet)  # Queue instead
 
 		return misses
 
@@ -75,21 +399,36 @@ class Switch(Device):
 class EndSystem(Device):
 	streams: list[Stream] = field(default_factory=list)
 
-	def receive(self: EndSystem) -> set[Stream]:
+	def receive(self: EndSystem, time: float) -> set[Stream]:
 		misses: set[Stream] = set()
 
-		for framelet in self.ingress:
-			logging.info(f"EndSystem {self.name} received framelet from")
+		for framelet in self._arrived(time):
+			if framelet.hop < len(framelet.path):
+				if tracing.tracer is not None:
+					tracing.tracer.record(EventKind.RECEIVE, framelet.localTime, 0.0, self, None, framelet)
 
-			if self != framelet.route[-1]:
-				self.egress.put(framelet)  # Queue instead
+				self.enqueue(framelet)  # Queue instead
 			else:  # Check if deadline is passed for frame
+				if self.recovery and framelet.instance.stream in self.recovery:
+					if self._eliminate(framelet, framelet.instance.received, framelet.id):
+						continue
+				else:
+					framelet.instance.received.add(framelet.id)
+
+				if tracing.tracer is not None:
+					tracing.tracer.record(EventKind.DELIVER, framelet.localTime, 0.0, self, None, framelet)
+
 				if framelet.instance.stream.WCTT < framelet.localTime - framelet.instance.release_time:
 					framelet.instance.stream.WCTT = framelet.localTime - framelet.instance.release_time
 
+				framelet.instance.delivered += 1
+				framelet.instance.latency = max(framelet.instance.latency, framelet.localTime - framelet.instance.release_time)
+
 				if framelet.localTime > framelet.instance.local_deadline:
 					misses.add(framelet.instance.stream)
-		self.ingress.clear()
+
+					if tracing.tracer is not None:
+						tracing.tracer.record(EventKind.MISS, framelet.localTime, 0.0, self, None, framelet)
 		return misses
 
 
@@ -111,6 +450,19 @@ class Framelet:
 		the size of the Framelet
 	route : list[Device]
 		The ordered list of devices the instance has to go through, without counting the emitting device
+	sequence : int
+		the creation order of the Framelet, breaking ties between equal priorities
+	key : int
+		the egress sort key of the Framelet, computed by the scheduling policy on creation
+	keys : tuple[int, ...]
+		the egress sort keys of the Framelet for the policies of the switches overriding the policy of the run, computed
+		on creation
+	path : list[int]
+		the indices of the links of the route, in a compiled network
+	route_index : int
+		the index of the route of the Framelet among the routes of its stream
+	hop : int
+		the index in the path of the next link the Framelet has to go through
 
 	Methods
 	-------
@@ -122,16 +474,22 @@ class Framelet:
 	instance: StreamInstance
 	size: int
 	route: list[Device]
+	sequence: int = 0
+	key: int = 0
+	keys: tuple[int, ...] = ()
+	path: list[int] = field(default_factory=list)
+	route_index: int = 0
+	hop: int = 0
 
 	def __eq__(self: Framelet, other: object) -> bool:
 		if isinstance(other, Framelet):
-			return self.instance.stream.rl.__eq__(other.instance.stream.rl)
+			return self.key.__eq__(other.key)
 		else:
 			return NotImplemented
 
 	def __lt__(self: Framelet, other: object) -> bool:
 		if isinstance(other, Framelet):
-			return self.instance.stream.rl.__gt__(other.instance.stream.rl)
+			return self.key.__lt__(other.key)
 		else:
 			return NotImplemented
 
@@ -173,17 +531,42 @@ class StreamInstance(Sequence):
 		the local deadline of the instance
 	framelets : list[Framelet]
 		the list of framelets of the instance
+	sequence : int
+		the index of the instance within its stream
+	delivered : int
+		the number of framelets of the instance delivered to the destination so far
+	received : set[int]
+		the ids of the framelets of the instance delivered by at least one route so far
+	forwarded : set[tuple[int, int]]
+		the framelets of the instance forwarded so far by switches eliminating replicas, by device index and id
+	eliminated : int
+		the number of replicas of framelets of the instance eliminated so far
+	discarded : dict[int, int]
+		the number of replicas of each framelet of the instance dropped at failed links or eliminated so far, by id
+	latency : float
+		the latency of the last framelet delivered so far, from the release of the instance
 
 	Methods
 	-------
 	check_framelets()
 		Checks that the sum of the sizes of all framelets is equal to the size of the stream
+	complete()
+		Returns whether every framelet has been delivered by at least one route
+	lost()
+		Returns whether a framelet can no longer be delivered by any route
 	"""
 
 	stream: Stream
 	release_time: int
 	local_deadline: int
 	framelets: list[Framelet] = field(default_factory=list)
+	sequence: int = 0
+	delivered: int = 0
+	received: set[int] = field(default_factory=set)
+	forwarded: set[tuple[int, int]] = field(default_factory=set)
+	eliminated: int = 0
+	discarded: dict[int, int] = field(default_factory=dict)
+	latency: float = 0.0
 
 	@overload
 	def __getitem__(self: StreamInstance, key: int) -> Framelet:
@@ -211,6 +594,19 @@ class StreamInstance(Sequence):
 	def __hash__(self: StreamInstance) -> int:
 		return hash(self.stream.id.__hash__() + self.local_deadline)
 
+	def complete(self: StreamInstance) -> bool:
+		"""Returns whether every framelet of the instance has been delivered by at least one of the routes."""
+
+		return len(self.received) * len(self.stream.paths) >= len(self.framelets)
+
+	def lost(self: StreamInstance) -> bool:
+		"""Returns whether every replica of a framelet of the instance has been dropped or eliminated without any of them
+		being delivered, so that the instance can no longer be completely delivered."""
+
+		return any(
+			count >= len(self.stream.paths) and id not in self.received for id, count in self.discarded.items()
+		)
+
 	def check_framelets(self: StreamInstance) -> int:
 		"""Checks that the sum of the sizes of all framelets is equal to the size of the stream.
 
@@ -222,16 +618,28 @@ class StreamInstance(Sequence):
 
 		return len(self.stream) - sum(framelet.size for framelet in self.framelets)
 
-	def create_framelets(self: StreamInstance) -> list[Framelet]:
+	def create_framelets(self: StreamInstance, policy: EgressPolicy = RedundancyFirst(), max_framelet_size: int = 64,
+		policies: Sequence[EgressPolicy] = (), size: Optional[int] = None) -> list[Framelet]:
 		# This puts the frames in order by a route basis. Could be changed to put frames in queue on an index basis
-		max_framelet_size: int = 64
 
-		for route in self.stream.routes:
-			complete = int(self.stream.size / max_framelet_size)
-			self.framelets.extend(Framelet(i, self, max_framelet_size, route) for i in range(complete))
+		# The size of the instance, if not the described size of the stream
+		size = self.stream.size if size is None else size
 
-			if (rest := self.stream.size % max_framelet_size) != 0:
-				self.framelets.append(Framelet(complete, self, rest, route))
+		for index, (route, path) in enumerate(zip(self.stream.routes, self.stream.paths)):
+			complete = int(size / max_framelet_size)
+			self.framelets.extend(
+				Framelet(i, self, max_framelet_size, route, next_sequence(), path=path, route_index=index)
+				for i in range(complete)
+			)
+
+			if (rest := size % max_framelet_size) != 0:
+				self.framelets.append(
+					Framelet(complete, self, rest, route, next_sequence(), path=path, route_index=index)
+				)
+
+		for framelet in self.framelets:
+			framelet.key = policy.key(framelet)
+			framelet.keys = tuple(other.key(framelet) for other in policies)
 
 		return self.framelets
 
@@ -260,10 +668,18 @@ class Stream(Sequence):
 		the deadline of the Stream
 	rl : int
 		a redundancy level
+	priority : int
+		the priority of the Stream (802.1Q PCP), from 0 to 7, the highest
+	express : bool
+		whether the Stream is express traffic, that can preempt other traffic (802.1Qbu)
+	offset : float
+		the release time of the Stream within its period
 	instances : list[StreamInstance]
 		a list of instances
 	routes : list[list[Device]]
 		a list of routes
+	paths : list[list[int]]
+		the routes as lists of link indices in a compiled network
 	WCTT : int
 		Worst-case transmission time detected while simulating
 	"""
@@ -275,8 +691,12 @@ class Stream(Sequence):
 	period: int
 	deadline: int
 	rl: int
+	priority: int = 0
+	express: bool = False
+	offset: float = 0.0
 	instances: list[StreamInstance] = field(default_factory=list)
 	routes: list[list[Device]] = field(default_factory=list)
+	paths: list[list[int]] = field(default_factory=list)
 	WCTT: int = 0
 
 	def __hash__(self: Stream) -> int:
@@ -305,6 +725,32 @@ class Stream(Sequence):
 
 		return NotImplemented
 
+	def reset(self: Stream) -> None:
+		"""Clears the simulation state of the stream, keeping its description and routes. The instances of the previous
+		run are left to its results."""
+
+		self.instances = []
+		self.WCTT = 0
+
+	def latencies(self: Stream) -> list[float]:
+		"""Returns the latencies of the instances that have been completely delivered, every replica of their framelets
+		having been delivered or eliminated.
+
+		Returns
+		-------
+		list[float]
+			The latency of each completely delivered instance, in order of release.
+		"""
+
+		return [
+			instance.latency for instance in self.instances if instance.delivered + instance.eliminated == len(instance)
+		]
+
+	def jitter(self: Stream) -> float:
+		"""Returns the difference between the largest and the smallest latency of the completely delivered instances."""
+
+		return max(latencies) - min(latencies) if (latencies := self.latencies()) else 0.0
+
 
 @dataclass
 class Solution:
@@ -321,16 +767,48 @@ class Solution:
 		a set of streams
 	routes : dict[Stream, set[list[Device]]]
 		a dictionary of streams as keys and set of routes as values
+	policy : str
+		the name of the egress scheduling policy simulated
+	wctts : dict[str, float]
+		the WCTT of each stream by id, as it was at the end of the simulation
+	jitters : dict[str, float]
+		the jitter of each stream by id, as it was at the end of the simulation
+	instances : dict[str, list[StreamInstance]]
+		the instances of each stream by id released by the simulation, which later runs leave untouched
+	counters : dict[str, DeviceCounters]
+		the counters of each device by name, as they were at the end of the simulation
+
+	Methods
+	-------
+	overdue(time)
+		Returns the number of instances of each stream lost or not completely delivered by their deadline
 	"""
 
 	network: DiGraph
 	streams: set[Stream] = field(default_factory=set)
 	misses: dict[float, set[Stream]] = field(default_factory=dict)
-
-	def transmission_time(self: Solution) -> tuple[list[int], int]:
-		wctts = [stream.WCTT for stream in self.streams]
+	policy: str = RedundancyFirst.name
+	wctts: dict[str, float] = field(default_factory=dict)
+	jitters: dict[str, float] = field(default_factory=dict)
+	instances: dict[str, list[StreamInstance]] = field(default_factory=dict)
+	counters: dict[str, DeviceCounters] = field(default_factory=dict)
+
+	def transmission_time(self: Solution) -> tuple[list[float], float]:
+		wctts = [self.wctts[stream.id] for stream in self.streams]
 		return wctts, sum(wctts)
 
+	def overdue(self: Solution, time: float) -> dict[str, int]:
+		"""Returns the number of instances of each stream, by id, lost at failed links, or whose deadline passed before a
+		time without being completely delivered."""
+
+		return {
+			id: sum(
+				1 for instance in instances
+				if instance.lost() or (instance.local_deadline <= time and not instance.complete())
+			)
+			for id, instances in self.instances.items()
+		}
+
 	def redundancyCheck(self: Solution) -> dict[Stream, bool]:
 		'''
 
@@ -26,10 +26,12 @@ def _add_streams(network_desc: Element, results: Solution) -> Element:
 			"period": str(stream.period),
 			"deadline": str(stream.deadline),
 			"rl": str(stream.rl),
-			"wctt": str(stream.WCTT),
+			"priority": str(stream.priority),
+			"express": str(stream.express).lower(),
+			"wctt": str(results.wctts[stream.id]),
 		})
 
-		for instance in stream.instances:
+		for instance in results.instances[stream.id]:
 			instance_element = SubElement(stream_element, "instance", {"local_deadline": str(instance.local_deadline)})
 
 			for framelet in instance.framelets:
@@ -80,13 +82,18 @@ def to_file(results: Solution, file: Path) -> Path:
 
 	logger.info(f"Writing the best results into '{filepath.name}'...")
 
-	network_desc = Element("NetworkDescription", {"cost": str(results.monetaryCost()), "Redundancy_Ratio":str(results.redundancySatisfiedRatio()), "Deadlines_missed":"Yes" if len(results.misses) > 0 else "No"})
-	worst_wctt = list(results.streams)[0].WCTT
+	network_desc = Element("NetworkDescription", {
+		"cost": str(results.monetaryCost()),
+		"Redundancy_Ratio": str(results.redundancySatisfiedRatio()),
+		"Deadlines_missed": "Yes" if len(results.misses) > 0 else "No",
+		"Policy": results.policy,
+	})
+	worst_wctt = results.wctts[list(results.streams)[0].id]
 	average_wctt = 0
 	for stream in results.streams:
-		if stream.WCTT > worst_wctt:
-			worst_wctt = stream.WCTT
-		average_wctt += stream.WCTT
+		if results.wctts[stream.id] > worst_wctt:
+			worst_wctt = results.wctts[stream.id]
+		average_wctt += results.wctts[stream.id]
 	average_wctt = average_wctt / len(results.streams)
 
 	SubElement(network_desc, "Worst_WCTT", {"Time": str(worst_wctt), "Unit": "Microseconds"})
@@ -99,7 +106,7 @@ def to_file(results: Solution, file: Path) -> Path:
 		SubElement(network_desc, "link", {"src": u.name, "dest": v.name, "speed": str(speed)})
 
 	for stream in results.streams:
-		SubElement(network_desc, "stream_times", {"id": stream.id, "WCTT" : str(stream.WCTT)})
+		SubElement(network_desc, "stream_times", {"id": stream.id, "WCTT" : str(results.wctts[stream.id])})
 
 	for time, streams in results.misses.items():
 		miss = SubElement(network_desc, "miss", {"time": str(time)})
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from itertools import count
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from model import Framelet, StreamInstance
+
+
+# Room left in a key for the sequence number, below the policy's own priority
+_SEQUENCE_SPAN = 1 << 40
+_sequence = count()
+
+
+def next_sequence() -> int:
+	"""Returns a new framelet sequence number, in creation order."""
+
+	return next(_sequence)
+
+
+class EgressPolicy:
+	"""
+	A class used to represent an egress scheduling policy, serving framelets in creation order
+
+	A policy packs its own priority of a framelet and the framelet sequence number into a single integer key, so the
+	egress queues only ever compare plain integers, and ties are broken in FIFO order.
+
+	...
+
+	Attributes
+	----------
+	name : str
+		the name of the policy, as selected from the CLI or the network description
+
+	Methods
+	-------
+	priority(instance)
+		Returns the priority of the framelets of a stream instance, lower being served first
+	key(framelet)
+		Returns the sort key of a framelet in an egress queue
+	"""
+
+	name = "fifo"
+
+	def priority(self: EgressPolicy, instance: StreamInstance) -> int:
+		return 0
+
+	def key(self: EgressPolicy, framelet: Framelet) -> int:
+		return self.priority(framelet.instance) * _SEQUENCE_SPAN + framelet.sequence
+
+
+class StrictPriority(EgressPolicy):
+	"""Serves the highest stream priority (802.1Q PCP, 7 being the highest) first."""
+
+	name = "priority"
+
+	def priority(self: StrictPriority, instance: StreamInstance) -> int:
+		return -instance.stream.priority
+
+
+class EarliestDeadlineFirst(EgressPolicy):
+	"""Serves the earliest local deadline first."""
+
+	name = "edf"
+
+	def priority(self: EarliestDeadlineFirst, instance: StreamInstance) -> int:
+		return int(instance.local_deadline)
+
+
+class RedundancyFirst(EgressPolicy):
+	"""Serves the highest redundancy level first."""
+
+	name = "redundancy"
+
+	def priority(self: RedundancyFirst, instance: StreamInstance) -> int:
+		return -instance.stream.rl
+
+
+POLICIES: dict[str, type[EgressPolicy]] = {
+	policy.name: policy for policy in (EgressPolicy, StrictPriority, EarliestDeadlineFirst, RedundancyFirst)
+}
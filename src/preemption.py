@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from model import Solution
+
+
+def report(baseline: Solution, preempted: Solution) -> str:
+	"""Compares the express streams latency and the link throughput between a simulation without and with preemption.
+
+	Parameters
+	----------
+	baseline : Solution
+		The results of a simulation without preemption.
+	preempted : Solution
+		The results of a simulation of the same model with preemption.
+
+	Returns
+	-------
+	str
+		A table holding the WCTT of each express stream in both simulations, followed by the preemption overhead.
+	"""
+
+	lines = [f"{'stream':<12}{'WCTT':>12}{'preempted WCTT':>16}{'reduction':>12}"]
+
+	for stream in sorted((stream for stream in preempted.streams if stream.express), key=lambda stream: stream.id):
+		wctt, preempted_wctt = baseline.wctts[stream.id], preempted.wctts[stream.id]
+		reduction = (1 - preempted_wctt / wctt) * 100 if wctt else 0.0
+		lines.append(f"{stream.id:<12}{wctt:>12.2f}{preempted_wctt:>16.2f}{reduction:>11.2f}%")
+
+	preemptions = sum(counters.preemptions for counters in preempted.counters.values())
+	overhead = sum(counters.overhead for counters in preempted.counters.values())
+	transmitted = sum(counters.transmitted for counters in preempted.counters.values())
+
+	lines.append(
+		f"{preemptions} preemptions, {overhead} overhead bytes out of {transmitted} transmitted "
+		f"({overhead / transmitted * 100 if transmitted else 0.0:.2f}% of the throughput)"
+	)
+	lines.append(f"deadline misses: {len(baseline.misses)} without preemption, {len(preempted.misses)} with")
+
+	return "\n".join(lines)
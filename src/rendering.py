@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from hashlib import sha256
+from pathlib import Path
+
+from networkx import DiGraph, spring_layout  # type: ignore
+
+import tracing
+from tracing import EventKind
+
+# Devices as (name, type) and links as (src, dest), so that they can be handed to another process cheaply
+Devices = list[tuple[str, str]]
+Links = list[tuple[str, str]]
+
+CACHE = Path.home() / ".cache" / "tsn-simulator" / "layouts"
+
+
+def describe(network: DiGraph) -> tuple[Devices, Links]:
+	"""Returns the devices and the links of a network as plain names, sorted.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+
+	Returns
+	-------
+	tuple[Devices, Links]
+		the name and type of each device, and the names of the devices of each link
+	"""
+
+	return (
+		sorted((device.name, device.__class__.__name__) for device in network.nodes),
+		sorted((src.name, dest.name) for src, dest in network.edges),
+	)
+
+
+def topology_hash(devices: Devices, links: Links) -> str:
+	"""Returns a digest identifying a topology, independent of the order of its description."""
+
+	return sha256(json.dumps([sorted(devices), sorted(links)]).encode()).hexdigest()
+
+
+def layout(devices: Devices, links: Links, cache: Path = CACHE) -> dict[str, tuple[float, float]]:
+	"""Returns the position of each device of a topology, computed once and cached per topology hash.
+
+	Parameters
+	----------
+	devices : Devices
+		the devices of the topology
+	links : Links
+		the links of the topology
+	cache : Path
+		the directory of the cached layouts
+
+	Returns
+	-------
+	dict[str, tuple[float, float]]
+		the position of each device, by name
+	"""
+
+	file = cache / f"{topology_hash(devices, links)}.json"
+
+	if file.exists():
+		return {name: (x, y) for name, (x, y) in json.loads(file.read_text()).items()}
+
+	graph = DiGraph()
+	graph.add_nodes_from(name for name, _ in devices)
+	graph.add_edges_from(links)
+
+	positions = {
+		name: (float(x), float(y))
+		for name, (x, y) in spring_layout(graph, k=3 / (len(devices) ** 0.5), iterations=50, seed=0).items()
+	}
+
+	cache.mkdir(parents=True, exist_ok=True)
+	file.write_text(json.dumps(positions))
+
+	return positions
+
+
+def figure_size(count: int) -> tuple[float, float]:
+	"""Returns the size of the figure of a topology in inches, growing with its number of devices."""
+
+	side = min(max(6.0, 3 * count ** 0.5), 30.0)
+
+	return side, side
+
+
+def draw_topology(devices: Devices, links: Links, axes, cache: Path = CACHE) -> None:
+	"""Draws a topology on matplotlib axes, switches in orange and end systems in blue, with a cached layout."""
+
+	from networkx import draw_networkx  # type: ignore
+
+	graph = DiGraph()
+	graph.add_nodes_from(name for name, _ in devices)
+	graph.add_edges_from(links)
+
+	axes.set_axis_off()
+	draw_networkx(
+		graph,
+		pos=layout(devices, links, cache),
+		ax=axes,
+		node_color=["tab:orange" if kind == "Switch" else "tab:blue" for _, kind in devices],
+		font_size=8,
+		connectionstyle="arc3, rad = 0.1",
+	)
+
+
+def render_topology(devices: Devices, links: Links, file: Path, cache: Path = CACHE) -> Path:
+	"""Renders a topology into an image file without any display, the format (PNG, SVG...) being given by its suffix.
+
+	Parameters
+	----------
+	devices : Devices
+		the devices of the topology
+	links : Links
+		the links of the topology
+	file : Path
+		the image file to write
+	cache : Path
+		the directory of the cached layouts
+
+	Returns
+	-------
+	Path
+		the image file written
+	"""
+
+	from matplotlib.figure import Figure  # type: ignore
+
+	figure = Figure(figsize=figure_size(len(devices)))
+	draw_topology(devices, links, figure.subplots(), cache)
+	figure.tight_layout()
+	figure.savefig(file)
+
+	return file
+
+
+def occupancy(events: list[tracing.TraceEvent]) -> dict[tuple[str, str], dict[str, list[tuple[float, float]]]]:
+	"""Returns the transmissions on each link, as the (start, duration) of the emissions of each stream.
+
+	Parameters
+	----------
+	events : list[TraceEvent]
+		decoded trace events
+
+	Returns
+	-------
+	dict[tuple[str, str], dict[str, list[tuple[float, float]]]]
+		the transmissions of each stream, by link
+	"""
+
+	links: dict[tuple[str, str], dict[str, list[tuple[float, float]]]] = defaultdict(lambda: defaultdict(list))
+
+	for event in events:
+		if event.kind == EventKind.EMIT and event.peer is not None:
+			links[event.device, event.peer][event.stream or "-"].append((event.time, event.duration))
+
+	return {link: dict(streams) for link, streams in links.items()}
+
+
+def render_occupancy(trace: Path, file: Path) -> Path:
+	"""Renders a Gantt chart of the occupancy of each link from a trace file into an image file without any display,
+	the format (PNG, SVG...) being given by its suffix.
+
+	Parameters
+	----------
+	trace : Path
+		a trace file
+	file : Path
+		the image file to write
+
+	Returns
+	-------
+	Path
+		the image file written
+	"""
+
+	from matplotlib import colormaps  # type: ignore
+	from matplotlib.figure import Figure  # type: ignore
+	from matplotlib.patches import Patch  # type: ignore
+
+	events, dropped = tracing.read(trace)
+	links = occupancy(events)
+	streams = sorted({stream for transmissions in links.values() for stream in transmissions})
+	colors = colormaps["tab20"]
+
+	figure = Figure(figsize=(16, max(3.0, 0.3 * len(links) + 1.5)))
+	axes = figure.subplots()
+
+	for row, link in enumerate(sorted(links)):
+		for stream, transmissions in links[link].items():
+			axes.broken_barh(transmissions, (row - 0.4, 0.8), facecolors=colors(streams.index(stream) % colors.N))
+
+	axes.set_yticks(range(len(links)), [f"{src} -> {dest}" for src, dest in sorted(links)], fontsize=7)
+	axes.set_ylim(-1, len(links))
+	axes.invert_yaxis()
+	axes.set_xlabel("time (microseconds)")
+	axes.set_title(f"Link occupancy{f' ({dropped} older events overwritten)' if dropped else ''}")
+
+	if len(streams) <= colors.N:
+		axes.legend(
+			handles=[Patch(color=colors(i), label=stream) for i, stream in enumerate(streams)],
+			loc="upper left",
+			bbox_to_anchor=(1.0, 1.0),
+			fontsize=7,
+		)
+
+	figure.tight_layout()
+	figure.savefig(file)
+
+	return file
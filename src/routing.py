@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from itertools import combinations, islice
+
+from model import Device, Stream
+
+from networkx import DiGraph  # type: ignore
+from networkx.algorithms.connectivity.disjoint_paths import node_disjoint_paths  # type: ignore
+from networkx.algorithms.simple_paths import shortest_simple_paths  # type: ignore
+
+Route = list[Device]
+Link = tuple[Device, Device]
+
+
+def greedy_routes(network: DiGraph, stream: Stream) -> list[Route]:
+	"""Returns the first `rl` node-disjoint routes of a stream, regardless of the other streams.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	stream : Stream
+		a stream
+
+	Returns
+	-------
+	list[Route]
+		at most `rl` node-disjoint routes from the source to the destination of the stream
+	"""
+
+	return list(islice(node_disjoint_paths(network, stream.src, stream.dest), stream.rl))
+
+
+def _candidates(network: DiGraph, stream: Stream, paths: int) -> list[list[Route]]:
+	"""Returns the candidate route sets of a stream: the greedy one, and the combinations of node-disjoint routes among
+	its shortest simple paths.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	stream : Stream
+		a stream
+	paths : int
+		the number of shortest simple paths to combine
+
+	Returns
+	-------
+	list[list[Route]]
+		the candidate route sets, each holding as many routes as the greedy one
+	"""
+
+	greedy = greedy_routes(network, stream)
+	shortest = list(islice(shortest_simple_paths(network, stream.src, stream.dest), paths))
+
+	return [greedy] + [
+		list(routes)
+		for routes in combinations(shortest, len(greedy))
+		if sum(len(route) - 2 for route in routes) == len({device for route in routes for device in route[1:-1]})
+	]
+
+
+def _links(route: Route) -> list[Link]:
+	return list(zip(route, route[1:]))
+
+
+def _usage(network: DiGraph, stream: Stream, routes: list[Route]) -> dict[Link, float]:
+	"""Returns the utilization of each link by a stream, were it routed on some routes."""
+
+	return {
+		link: stream.size / stream.period / network.edges[link]["speed"]
+		for route in routes
+		for link in _links(route)
+	}
+
+
+def utilization(network: DiGraph, streams: set[Stream]) -> dict[Link, float]:
+	"""Returns the utilization of each link by the routes of the streams, as the ratio of the bandwidth of the streams
+	(`size / period`) to the speed of the link.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	streams : set[Stream]
+		a set of routed streams
+
+	Returns
+	-------
+	dict[Link, float]
+		the utilization of each link used by at least one route
+	"""
+
+	load: dict[Link, float] = defaultdict(float)
+
+	for stream in streams:
+		for link, value in _usage(network, stream, stream.routes).items():
+			load[link] += value
+
+	return dict(load)
+
+
+def balance_routes(network: DiGraph, streams: set[Stream], paths: int = 8, rounds: int = 16) -> None:
+	"""Reassigns the routes of the streams to minimize the maximum link utilization, by iterative rerouting.
+	Starting from the greedy routes, each stream in turn, heaviest first, is rerouted on the candidate route set that
+	minimizes the maximum utilization of its links given the other streams, then the sum of their squared utilizations,
+	until no stream changes or the number of rounds is reached. Redundancy levels are kept.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	streams : set[Stream]
+		a set of streams, whose routes are replaced
+	paths : int
+		the number of shortest simple paths combined into candidate route sets for each stream
+	rounds : int
+		the maximum number of rerouting rounds
+	"""
+
+	order = sorted(streams, key=lambda stream: (-stream.size / stream.period, stream.id))
+	candidates = {stream: _candidates(network, stream, paths) for stream in order}
+
+	for stream in order:
+		stream.routes = candidates[stream][0]
+
+	load: dict[Link, float] = defaultdict(float, utilization(network, streams))
+
+	for _ in range(rounds):
+		changed = False
+
+		for stream in order:
+			for link, value in _usage(network, stream, stream.routes).items():
+				load[link] -= value
+
+			costs = [
+				(max(loads, default=0.0), sum(value ** 2 for value in loads))
+				for loads in (
+					[load[link] + value for link, value in _usage(network, stream, routes).items()]
+					for routes in candidates[stream]
+				)
+			]
+			best = min(range(len(costs)), key=costs.__getitem__)
+
+			if costs[best] < costs[candidates[stream].index(stream.routes)]:
+				stream.routes = candidates[stream][best]
+				changed = True
+
+			for link, value in _usage(network, stream, stream.routes).items():
+				load[link] += value
+
+		if not changed:
+			break
+
+
+def estimated_wctt(network: DiGraph, streams: set[Stream]) -> dict[Stream, float]:
+	"""Estimates the WCTT of the streams, assuming that every hop waits for one instance of each stream sharing the
+	link to be transmitted.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	streams : set[Stream]
+		a set of routed streams
+
+	Returns
+	-------
+	dict[Stream, float]
+		the estimated WCTT of each stream, over its slowest route
+	"""
+
+	queued: dict[Link, int] = defaultdict(int)
+
+	for stream in streams:
+		for route in stream.routes:
+			for link in _links(route):
+				queued[link] += stream.size
+
+	return {
+		stream: max(
+			(sum(queued[link] / network.edges[link]["speed"] for link in _links(route)) for route in stream.routes),
+			default=0.0,
+		)
+		for stream in streams
+	}
+
+
+def report(network: DiGraph, streams: set[Stream]) -> str:
+	"""Compares the link utilization and the estimated WCTT of the current routes of the streams with the greedy ones.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph
+	streams : set[Stream]
+		a set of routed streams
+
+	Returns
+	-------
+	str
+		A table holding the estimated WCTT of each stream with both route selections, followed by the utilizations.
+	"""
+
+	routes = {stream: stream.routes for stream in streams}
+	balanced_utilization, balanced_wctt = utilization(network, streams), estimated_wctt(network, streams)
+
+	for stream in streams:
+		stream.routes = greedy_routes(network, stream)
+
+	greedy_utilization, greedy_wctt = utilization(network, streams), estimated_wctt(network, streams)
+
+	for stream in streams:
+		stream.routes = routes[stream]
+
+	lines = [f"{'stream':<12}{'greedy WCTT':>14}{'balanced WCTT':>16}"]
+
+	for stream in sorted(streams, key=lambda stream: stream.id):
+		lines.append(f"{stream.id:<12}{greedy_wctt[stream]:>14.2f}{balanced_wctt[stream]:>16.2f}")
+
+	for name, function in (("max", max), ("mean", lambda values: sum(values) / len(values))):
+		lines.append(
+			f"{name} estimated WCTT: {function(list(greedy_wctt.values()) or [0.0]):.2f} greedy, "
+			f"{function(list(balanced_wctt.values()) or [0.0]):.2f} balanced"
+		)
+	lines.append(
+		f"max link utilization: {max(greedy_utilization.values(), default=0.0) * 100:.2f}% greedy, "
+		f"{max(balanced_utilization.values(), default=0.0) * 100:.2f}% balanced"
+	)
+
+	return "\n".join(lines)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+import accounting
+
+from builder import build, schedule_stream_instantiations
+
+from compiled import compile_network
+
+from model import Solution, Stream
+
+from policy import EgressPolicy, RedundancyFirst
+
+from simulator import simulate
+
+import tas
+
+if TYPE_CHECKING:
+	from faults import Failure
+
+
+class Session:
+	"""
+	A class used to simulate a model repeatedly, building it only once
+
+	The topology, the routes, the stream descriptions and the release schedule are built once and never changed by a
+	run, the parameters of a run such as scaled stream sizes being passed to the simulation instead. The run state held
+	by the devices and the streams is reset before each run, and the results of a run own its instances, WCTTs,
+	jitters, misses and device counters, so that they are left untouched by later runs.
+
+	...
+
+	Attributes
+	----------
+	file : Path
+		the network description the model has been built from
+	network : DiGraph
+		the network
+	streams : set[Stream]
+		the streams, routed
+	stream_emissions : dict[float, set[Stream]]
+		the emission times of the streams within a hyperperiod
+	emitters : set[Device]
+		the devices that can emit data
+	receivers : set[Device]
+		the devices that can receive data
+	hyperperiod : int
+		the hyperperiod of the streams
+	compiled : CompiledNetwork
+		the network compiled for the simulation
+
+	Methods
+	-------
+	synthesize(framelet_size)
+		Synthesizes the gate control lists of the network
+	reset()
+		Clears the run state of the model
+	run(time_limit, stop_on_miss, policy, framelet_size, preemption, failure, elimination, scale)
+		Resets the model and simulates it
+	pool(workers)
+		Returns a pool of processes sharing the model
+	"""
+
+	def __init__(self: Session, file: Path, routing: str = "greedy") -> None:
+		self.file = file
+
+		with accounting.phase("build"):
+			self.network, self.streams, self.stream_emissions, self.emitters, self.receivers, self.hyperperiod, \
+				self.compiled = build(file, routing)
+
+	def synthesize(self: Session, framelet_size: int = 64) -> dict[Stream, float]:
+		"""Synthesizes a no-wait schedule of the streams as gate control lists, and reschedules the streams accordingly.
+
+		Parameters
+		----------
+		framelet_size : int
+			The maximum size of the framelets of the runs to schedule, in bytes.
+
+		Returns
+		-------
+		dict[Stream, float]
+			The scheduled latency of each stream.
+		"""
+
+		with accounting.phase("schedule"):
+			scheduled = tas.synthesize(self.network, self.streams, self.hyperperiod, framelet_size)
+			self.stream_emissions = schedule_stream_instantiations(self.streams, self.hyperperiod)
+			self.compiled = compile_network(self.network, self.streams)
+
+		return scheduled
+
+	def reset(self: Session) -> None:
+		"""Clears the run state of the devices and the streams."""
+
+		for device in self.compiled.devices:
+			device.reset()
+
+		for stream in self.streams:
+			stream.reset()
+
+	def run(self: Session, time_limit: int, stop_on_miss: bool = False, policy: Optional[EgressPolicy] = None,
+		framelet_size: int = 64, preemption: bool = False, failure: Optional[Failure] = None,
+		elimination: Optional[str] = None, scale: float = 1.0) -> tuple[Solution, float]:
+		"""Resets the model and simulates it.
+
+		Parameters
+		----------
+		time_limit : int
+			The iteration limit of the simulation, or a negative value for none.
+		stop_on_miss : bool
+			Whether the simulation stops on the first deadline miss.
+		policy : Optional[EgressPolicy]
+			The egress scheduling policy of the devices, unless overridden by a switch. Redundancy first if None.
+		framelet_size : int
+			The maximum size of the framelets, in bytes.
+		preemption : bool
+			Whether express streams preempt the transmission of the other streams.
+		failure : Optional[Failure]
+			The links failing during the simulation, if any.
+		elimination : Optional[str]
+			Where the replicas of the framelets are eliminated (802.1CB): "receiver", "merge", or None for nowhere.
+		scale : float
+			The factor the sizes of the instances are scaled by, from the described size of their stream.
+
+		Returns
+		-------
+		tuple[Solution, float]
+			The results of the simulation, and the simulated time.
+		"""
+
+		self.reset()
+		sizes = None if scale == 1.0 else {stream.id: max(1, round(stream.size * scale)) for stream in self.streams}
+
+		with accounting.phase("simulate"):
+			return simulate(
+				self.network, self.streams, self.stream_emissions, self.emitters, self.receivers, time_limit, stop_on_miss,
+				self.hyperperiod, RedundancyFirst() if policy is None else policy, framelet_size, preemption, self.compiled,
+				failure, elimination, sizes,
+			)
+
+	def pool(self: Session, workers: Optional[int] = None) -> ProcessPoolExecutor:
+		"""Returns a pool of processes sharing the model, available to the tasks as `shared()`. The model is inherited by
+		the processes when they can be forked, and copied once to each of them otherwise.
+
+		Parameters
+		----------
+		workers : Optional[int]
+			The number of processes, or the number of processors if None.
+
+		Returns
+		-------
+		ProcessPoolExecutor
+			The pool of processes.
+		"""
+
+		context = get_context("fork" if "fork" in get_all_start_methods() else "spawn")
+
+		return ProcessPoolExecutor(workers, mp_context=context, initializer=share, initargs=(self, ))
+
+
+_shared: Optional[Session] = None  # The model shared with the current process
+
+
+def share(session: Session) -> None:
+	"""Makes a session the one shared with the current process."""
+
+	global _shared
+	_shared = session
+
+
+def shared() -> Session:
+	"""Returns the session shared with the current process."""
+
+	assert _shared is not None
+
+	return _shared
@@ -1,95 +1,120 @@
+from __future__ import annotations
+
 import logging
+from heapq import heapify, heappop, heappushpop
+
+import accounting
+
+from compiled import CompiledNetwork, DeviceKind, compile_network
+
+import frer
 
-from model import Device, EndSystem, Framelet, Solution, Stream, StreamInstance
+from model import Device, Solution, Stream, StreamInstance
+
+from policy import EgressPolicy, RedundancyFirst
 
 from networkx import DiGraph  # type: ignore
 
-from queue import PriorityQueue
+from typing import Optional, TYPE_CHECKING
+
+import tracing
+from tracing import EventKind
 
-from typing import Optional
+if TYPE_CHECKING:
+	from faults import Failure
 
 
-def enqueue_streams(sched_current, simulator_age):
+def enqueue_streams(sched_current, simulator_age, policy: EgressPolicy, framelet_size: int,
+	policies: list[EgressPolicy], sizes: Optional[dict[str, int]] = None):
 	for stream in sched_current[1]:
-		instance = StreamInstance(stream, simulator_age, simulator_age + stream.deadline)
+		instance = StreamInstance(stream, simulator_age, simulator_age + stream.deadline, sequence=len(stream.instances))
 		stream.instances.append(instance)
 
 		# Enqueue stream framelets at device
-		for framelet in instance.create_framelets():
-			stream.src.egress.put(framelet)
+		for framelet in instance.create_framelets(
+			policy, framelet_size, policies, None if sizes is None else sizes[stream.id]
+		):
+			if tracing.tracer is not None:
+				tracing.tracer.record(EventKind.RELEASE, simulator_age, 0.0, stream.src, None, framelet)
+
+			stream.src.enqueue(framelet)
 
 
-def simulate(network: DiGraph, streams: set[Stream], scheduling: dict[int, set[Stream]], emitters: set[Device],
-	receivers: set[Device], time_limit: int, stop_on_miss: bool, hyperperiod: int) -> Solution:
+def simulate(network: DiGraph, streams: set[Stream], scheduling: dict[float, set[Stream]], emitters: set[Device],
+	receivers: set[Device], time_limit: int, stop_on_miss: bool, hyperperiod: int,
+	policy: EgressPolicy = RedundancyFirst(), framelet_size: int = 64, preemption: bool = False,
+	compiled: Optional[CompiledNetwork] = None, failure: Optional[Failure] = None, elimination: Optional[str] = None,
+	sizes: Optional[dict[str, int]] = None) -> Solution:
 	logger = logging.getLogger()
 	iteration: int = 0
 	misses: dict[float, set[Stream]] = {}
 	simulator_age_current = 0.0
 	simulator_age_last = simulator_age_current
-	scheduler_it = iter(scheduling.items())
-
-	# Check edge case for all stream periods being equal
-	periods_equal = True
-	period = 0
-	period = next(scheduler_it)[0]
-	try:
-		for sched in scheduler_it:
-			if sched[0] != period:
-				periods_equal = False
-				break
-	except:
-		pass
-
-	scheduler_it = iter(scheduling.items())
-	sched_current = next(scheduler_it)
-
-	"""
-	for time, streams in scheduling.items():
-		print(time)
-		for stream in streams:
-			print(f"\t{stream.id}")
-	"""
-
-	deviceQueue = PriorityQueue()
-	for device in network.nodes:
-		deviceQueue.put((device.localTime, device))
-
-	simulator_age_current, currentDevice = deviceQueue.get()
+
+	# The simulation runs on the compiled network, the graph only being kept for the results
+	if compiled is None:
+		compiled = compile_network(network, streams)
+
+	devices = compiled.devices
+	ports = compiled.ports
+	frer.configure(compiled, streams, elimination)
+	kinds = compiled.kinds
+
+	# Releases of the current hyperperiod, starting at `release_base`
+	releases = sorted(scheduling.items())
+	release_index = 0
+	release_base = 0.0
+
+	# Every output port transmits independently, on its own clock
+	portQueue = [(port.localTime, port.link) for port in ports]
+	heapify(portQueue)
+
+	simulator_age_current, current = heappop(portQueue)
 
 	loop_cond = (lambda t, tl: t < tl) if time_limit > 0 else (lambda tl, t: True)
 
 	while loop_cond(iteration, time_limit):
-		if periods_equal and simulator_age_current >= period:
-			enqueue_streams(sched_current, simulator_age_current)
-			period += list(sched_current[1])[0].period
-		elif not periods_equal and sched_current[0] <= simulator_age_current % hyperperiod:
-			enqueue_streams(sched_current, simulator_age_current)
-			try:
-				sched_current = next(scheduler_it)
-			except StopIteration:
-				scheduler_it = iter(scheduling.items())
-				sched_current = next(scheduler_it)
-
-		# Perform receive and emit for the device
-		currentDevice.emit(network)  # Emit next framelet
+		# From the time of the failure on, the ports of its links drop their framelets
+		if failure is not None and failure.time <= simulator_age_current:
+			for link in failure.links:
+				ports[link].down = True
+			failure = None
+
+		while release_base + releases[release_index][0] <= simulator_age_current:
+			# At the time of the release, which the end systems wake up at, even if their ports are late
+			enqueue_streams(
+				releases[release_index], release_base + releases[release_index][0], policy, framelet_size,
+				compiled.policies, sizes,
+			)
+
+			release_index += 1
+			if release_index == len(releases):
+				release_index = 0
+				release_base += hyperperiod
+
+		# Perform emit for the port
+		currentPort = ports[current]
+		currentPort.emit(compiled, preemption, release_base + releases[release_index][0])  # Emit next framelet
 
 		if misses and stop_on_miss:
 			break
 
-		# Put the device back on the queue with its updated age
-		deviceQueue.put((currentDevice.localTime, currentDevice))
+		# Put the port back on the queue with its updated age, and extract the currently youngest port in terms of
+		# simulator age. Store this time as the simulators overall guarenteed time simulated so far
+		simulator_age_current, current = heappushpop(portQueue, (currentPort.localTime, current))
 
-		# Extract the currently youngest device in terms of simulator age
-		# Store this time as the simulators overall guarenteed time simulated so far
-		simulator_age_current, currentDevice = deviceQueue.get()
 		if simulator_age_current > simulator_age_last:
-			for device in network.nodes:
-				if isinstance(device, EndSystem):
-					new_misses = device.receive()
+			for index, device in enumerate(devices):
+				if not device.ingress:
+					continue
+
+				# Framelets are only received once they have arrived, not when they are sent
+				if kinds[index] == DeviceKind.END_SYSTEM:
+					new_misses = device.receive(simulator_age_current)
 					if new_misses:
 						misses[simulator_age_current] = new_misses
 				else:
-					device.receive()
+					device.receive(simulator_age_current)
 
 		simulator_age_last = simulator_age_current
 
@@ -97,4 +122,16 @@ def simulate(network: DiGraph, streams: set[Stream], scheduling: dict[int, set[S
 
 	logger.info("done.")
 
-	return Solution(network, streams, misses), simulator_age_current
+	if accounting.accountant is not None:
+		accounting.accountant.record(
+			simulator_age_current, sum(device.emissions for device in devices),
+			sum(len(instance) for stream in streams for instance in stream.instances),
+		)
+
+	return Solution(
+		network, streams, misses, policy.name,
+		{stream.id: stream.WCTT for stream in streams},
+		{stream.id: stream.jitter() for stream in streams},
+		{stream.id: stream.instances for stream in streams},
+		{device.name: device.counters() for device in devices},
+	), simulator_age_current
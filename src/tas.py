@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+from bisect import bisect, insort
+from collections import defaultdict
+from dataclasses import dataclass, field
+from math import inf
+from xml.etree.ElementTree import Element
+
+from model import Device, MIN_FRAME_SIZE, Solution, Stream
+
+from networkx import DiGraph  # type: ignore
+
+
+@dataclass
+class GateControlList:
+	"""
+	A class used to represent the gate control list of an egress port (802.1Qbv)
+
+	...
+
+	Attributes
+	----------
+	cycle : float
+		the cycle time of the list, in microseconds
+	windows : list[tuple[float, float, frozenset[int]]]
+		the windows of the list as (offset, duration, open traffic classes), sorted by offset. All the gates are closed
+		outside of the windows.
+
+	Methods
+	-------
+	admits(time, tc, duration)
+		Returns whether a transmission may start at a given time
+	next_open(time, tc, duration)
+		Returns the earliest time from which a transmission may start
+	"""
+
+	cycle: float
+	windows: list[tuple[float, float, frozenset[int]]] = field(default_factory=list)
+
+	def admits(self: GateControlList, time: float, tc: int, duration: float) -> bool:
+		"""Returns whether the gate of a traffic class is open at a given time, and stays open long enough for the
+		transmission to end before it closes.
+
+		Parameters
+		----------
+		time : float
+			The time the transmission would start at.
+		tc : int
+			The traffic class of the transmission.
+		duration : float
+			The duration of the transmission.
+
+		Returns
+		-------
+		bool
+			True if the transmission may start, False otherwise.
+		"""
+
+		phase = time % self.cycle
+
+		return any(
+			offset <= phase and phase + duration <= offset + length
+			for offset, length, gates in self.windows
+			if tc in gates
+		)
+
+	def next_open(self: GateControlList, time: float, tc: int, duration: float) -> float:
+		"""Returns the earliest time from a given time at which a transmission may start.
+
+		Parameters
+		----------
+		time : float
+			The time from which the transmission waits.
+		tc : int
+			The traffic class of the transmission.
+		duration : float
+			The duration of the transmission.
+
+		Returns
+		-------
+		float
+			The earliest start time, or infinity if no window of the traffic class can hold the transmission.
+		"""
+
+		base = time - time % self.cycle
+
+		for start in (base, base + self.cycle):
+			for offset, length, gates in self.windows:
+				if tc in gates and (begin := max(start + offset, time)) + duration <= start + offset + length:
+					return begin
+
+		return inf
+
+
+def insert_gate_control_lists(root: Element, network: DiGraph) -> DiGraph:
+	"""Inserts gate control lists from an XML element into the links of a DiGraph and returns it.
+	A list is described by a `gcl` element with `src`, `dest` and `cycle` attributes, holding `window` elements with
+	`offset`, `duration` and `gates` attributes, the latter being a space-separated list of open traffic classes.
+
+	Parameters
+	----------
+	root : Element
+		an XML element containing gate control lists
+	network : DiGraph
+		a graph
+
+	Returns
+	-------
+	network : DiGraph
+		the graph into which the gate control lists have been inserted
+	"""
+
+	for gcl in root.iter("gcl"):
+		src = next(node for node in network.nodes if node.name == gcl.get("src"))
+		dest = next(node for node in network.nodes if node.name == gcl.get("dest"))
+
+		network.edges[src, dest]["gcl"] = GateControlList(
+			float(gcl.get("cycle")),
+			sorted(
+				(float(window.get("offset")), float(window.get("duration")), frozenset(map(int, window.get("gates").split())))
+				for window in gcl.iter("window")
+			),
+		)
+
+	return network
+
+
+def _wrap(start: float, end: float, cycle: float) -> list[tuple[float, float]]:
+	"""Returns an interval taken modulo a cycle, split in two if it wraps around the end of the cycle."""
+
+	phase = start % cycle
+	end = phase + end - start
+
+	return [(phase, end)] if end <= cycle else [(phase, cycle), (0.0, end - cycle)]
+
+
+def _overlaps(reserved: list[tuple[float, float]], start: float, end: float, cycle: float) -> bool:
+	"""Returns whether an interval, taken modulo a cycle, overlaps any of the sorted disjoint reserved intervals."""
+
+	for begin, stop in _wrap(start, end, cycle):
+		i = bisect(reserved, (begin, inf))
+
+		if (0 < i and begin < reserved[i - 1][1]) or (i < len(reserved) and reserved[i][0] < stop):
+			return True
+
+	return False
+
+
+def synthesize(network: DiGraph, streams: set[Stream], hyperperiod: int, framelet_size: int = 64) \
+	-> dict[Stream, float]:
+	"""Synthesizes a no-wait schedule of the streams and inserts it into the links of the network as gate control lists.
+	Streams are scheduled in deadline order. Each stream gets the earliest release offset in its period at which every
+	hop of its routes can forward the whole instance as soon as its first framelet arrived, for all the instances of the
+	hyperperiod, without overlapping the windows already reserved on the same links, as each output port transmits
+	independently. The offsets are set on the streams, which then have to be scheduled again.
+
+	Parameters
+	----------
+	network : DiGraph
+		a graph whose streams have been routed
+	streams : set[Stream]
+		the streams to schedule
+	hyperperiod : int
+		the hyperperiod of the streams, used as the cycle of the gate control lists
+	framelet_size : int
+		the maximum size of the framelets the streams are split into, in bytes
+
+	Returns
+	-------
+	latencies : dict[Stream, float]
+		the scheduled latency of each stream from its release, or infinity for the streams that could not be scheduled
+	"""
+
+	step = min(max(framelet_size, MIN_FRAME_SIZE) / speed for _, _, speed in network.edges(data="speed"))
+	reserved: dict[tuple[Device, Device], list[tuple[float, float]]] = defaultdict(list)
+	windows: dict[tuple[Device, Device], list[tuple[float, float, frozenset[int]]]] = defaultdict(list)
+	latencies: dict[Stream, float] = {}
+
+	for stream in sorted(streams, key=lambda stream: (stream.deadline, stream.period, stream.id)):
+		# Bytes on the wire of the first framelet, the last one and the whole instance, short frames being padded
+		complete, rest = divmod(stream.size, framelet_size)
+		first = max(min(stream.size, framelet_size), MIN_FRAME_SIZE)
+		last = max(rest, MIN_FRAME_SIZE) if rest else first
+		total = complete * max(framelet_size, MIN_FRAME_SIZE) + (max(rest, MIN_FRAME_SIZE) if rest else 0)
+		# Windows of the hops relative to the release of an instance, padded by a framelet as guard band
+		hops: list[tuple[tuple[Device, Device], float, float]] = []
+		latency = 0.0
+
+		for route in stream.routes:
+			begin = end = 0.0
+
+			for link in zip(route, route[1:]):
+				speed = network.edges[link]["speed"]
+				end = max(begin + total / speed, end + last / speed)
+				hops.append((link, begin, end + first / speed))
+				begin += first / speed
+
+			latency = max(latency, end)
+
+		offset = next(
+			(
+				offset
+				for offset in (i * step for i in range(int((stream.period - latency) / step) + 1))
+				if not any(
+					_overlaps(reserved[link], release + start, release + stop, hyperperiod)
+					for release in (k * stream.period + offset for k in range(hyperperiod // stream.period))
+					for link, start, stop in hops
+				)
+			),
+			None,
+		)
+
+		if offset is None:
+			latencies[stream] = inf
+			continue
+
+		stream.offset = offset
+		latencies[stream] = latency
+
+		for release in (k * stream.period + offset for k in range(hyperperiod // stream.period)):
+			for link, start, stop in hops:
+				for phase, until in _wrap(release + start, release + stop, hyperperiod):
+					insort(reserved[link], (phase, until))
+					windows[link].append((phase, until - phase, frozenset({stream.priority})))
+
+	for link, entries in windows.items():
+		network.edges[link]["gcl"] = GateControlList(float(hyperperiod), sorted(entries))
+
+	return latencies
+
+
+def report(ungated: Solution, gated: Solution, scheduled: dict[Stream, float]) -> str:
+	"""Compares the latency and jitter of the streams between an ungated and a gated simulation.
+
+	Parameters
+	----------
+	ungated : Solution
+		The results of a simulation without gate control lists.
+	gated : Solution
+		The results of a simulation of the same model with the synthesized gate control lists.
+	scheduled : dict[Stream, float]
+		The scheduled latency of the gated streams.
+
+	Returns
+	-------
+	str
+		A table holding the WCTT and jitter of each stream in both simulations.
+	"""
+
+	scheduled_by_id = {stream.id: latency for stream, latency in scheduled.items()}
+	lines = [
+		f"{'stream':<12}{'offset':>10}{'scheduled':>12}{'WCTT':>12}{'jitter':>12}{'gated WCTT':>12}{'gated jitter':>14}"
+	]
+
+	for stream in sorted(gated.streams, key=lambda stream: stream.id):
+		lines.append(
+			f"{stream.id:<12}{stream.offset:>10.2f}{scheduled_by_id[stream.id]:>12.2f}"
+			f"{ungated.wctts[stream.id]:>12.2f}{ungated.jitters[stream.id]:>12.2f}"
+			f"{gated.wctts[stream.id]:>12.2f}{gated.jitters[stream.id]:>14.2f}"
+		)
+
+	lines.append(f"deadline misses: {len(ungated.misses)} ungated, {len(gated.misses)} gated")
+
+	return "\n".join(lines)
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import json
+from argparse import ArgumentParser
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import IntEnum
+from pathlib import Path
+from struct import Struct
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+	from model import Device, Framelet
+
+
+class EventKind(IntEnum):
+	"""The kinds of events recorded in a trace."""
+
+	RELEASE = 0
+	EMIT = 1
+	RECEIVE = 2
+	DELIVER = 3
+	MISS = 4
+	DROP = 5
+	ELIMINATE = 6
+
+
+# time, duration, device, peer, stream, instance, framelet, route, kind
+_RECORD = Struct("<ddIIIIIIB")
+_HEADER = Struct("<8sI")
+_MAGIC = b"TSNTRACE"
+_NONE = 0xFFFFFFFF
+
+
+class Tracer:
+	"""
+	A class used to record simulation events into a preallocated binary ring buffer
+
+	...
+
+	Attributes
+	----------
+	capacity : int
+		the maximum number of events held, older events being overwritten first
+	buffer : bytearray
+		the preallocated ring buffer
+	count : int
+		the total number of events recorded so far
+	devices : dict[str, int]
+		the device names interned so far, with their trace id
+	streams : dict[str, int]
+		the stream ids interned so far, with their trace id
+
+	Methods
+	-------
+	record(kind, time, duration, device, peer, framelet)
+		Packs an event into the ring buffer
+	save(file)
+		Writes the recorded events into a binary trace file
+	"""
+
+	def __init__(self: Tracer, capacity: int) -> None:
+		self.capacity = capacity
+		self.buffer = bytearray(capacity * _RECORD.size)
+		self.count = 0
+		self.devices: dict[str, int] = {}
+		self.streams: dict[str, int] = {}
+
+	def record(self: Tracer, kind: EventKind, time: float, duration: float, device: Device,
+		peer: Optional[Device] = None, framelet: Optional[Framelet] = None) -> None:
+		"""Packs an event into the ring buffer, overwriting the oldest event when full."""
+
+		devices = self.devices
+
+		if framelet is not None:
+			stream = framelet.instance.stream.id
+			stream_id = self.streams.setdefault(stream, len(self.streams))
+			instance, index, route = framelet.instance.sequence, framelet.id, framelet.route_index
+		else:
+			stream_id, instance, index, route = _NONE, _NONE, _NONE, _NONE
+
+		_RECORD.pack_into(
+			self.buffer,
+			(self.count % self.capacity) * _RECORD.size,
+			time,
+			duration,
+			devices.setdefault(device.name, len(devices)),
+			_NONE if peer is None else devices.setdefault(peer.name, len(devices)),
+			stream_id,
+			instance,
+			index,
+			route,
+			kind,
+		)
+		self.count += 1
+
+	def save(self: Tracer, file: Path) -> Path:
+		"""Writes the recorded events, oldest first, into a binary trace file.
+
+		Parameters
+		----------
+		file : Path
+			The trace file to write.
+
+		Returns
+		-------
+		file : Path
+			The trace file written.
+		"""
+
+		header = json.dumps({
+			"devices": list(self.devices),
+			"streams": list(self.streams),
+			"dropped": max(0, self.count - self.capacity),
+		}).encode()
+
+		with open(file, "wb") as trace:
+			trace.write(_HEADER.pack(_MAGIC, len(header)))
+			trace.write(header)
+
+			if self.count > self.capacity:
+				split = (self.count % self.capacity) * _RECORD.size
+				trace.write(self.buffer[split:])
+				trace.write(self.buffer[:split])
+			else:
+				trace.write(self.buffer[:self.count * _RECORD.size])
+
+		return file
+
+
+# The active tracer, if any. Hot paths check it against None before doing any work, so a disabled trace costs
+# nothing more than that comparison.
+tracer: Optional[Tracer] = None
+
+
+def enable(capacity: int = 1 << 20) -> Tracer:
+	"""Creates a tracer holding up to `capacity` events and makes it the active one."""
+
+	global tracer
+	tracer = Tracer(capacity)
+
+	return tracer
+
+
+def disable() -> None:
+	"""Deactivates the active tracer."""
+
+	global tracer
+	tracer = None
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+	"""
+	A class used to represent a decoded trace event
+
+	...
+
+	Attributes
+	----------
+	kind : EventKind
+		the kind of event
+	time : float
+		the simulation time the event happened at
+	duration : float
+		the duration of the event, for emissions
+	device : str
+		the device the event happened on
+	peer : Optional[str]
+		the device the framelet has been emitted to, for emissions
+	stream : Optional[str]
+		the stream of the framelet involved, if any
+	instance : int
+		the sequence number of the stream instance involved
+	framelet : int
+		the index of the framelet involved within its instance
+	route : int
+		the index of the route of the framelet involved among the routes of its stream
+	"""
+
+	kind: EventKind
+	time: float
+	duration: float
+	device: str
+	peer: Optional[str]
+	stream: Optional[str]
+	instance: int
+	framelet: int
+	route: int
+
+
+def read(file: Path) -> tuple[list[TraceEvent], int]:
+	"""Decodes a binary trace file.
+
+	Parameters
+	----------
+	file : Path
+		A trace file written by `Tracer.save`.
+
+	Returns
+	-------
+	tuple[list[TraceEvent], int]
+		The events in recording order, and the number of older events dropped by the ring buffer.
+	"""
+
+	data = Path(file).read_bytes()
+	magic, length = _HEADER.unpack_from(data)
+
+	if magic != _MAGIC:
+		raise ValueError(f"'{file}' is not a trace file")
+
+	header = json.loads(data[_HEADER.size:_HEADER.size + length])
+	devices, streams = header["devices"], header["streams"]
+
+	events = [
+		TraceEvent(
+			EventKind(kind),
+			time,
+			duration,
+			devices[device],
+			None if peer == _NONE else devices[peer],
+			None if stream == _NONE else streams[stream],
+			instance,
+			framelet,
+			route,
+		)
+		for time, duration, device, peer, stream, instance, framelet, route, kind
+		in _RECORD.iter_unpack(data[_HEADER.size + length:])
+	]
+
+	return events, header["dropped"]
+
+
+def timelines(events: list[TraceEvent]) -> dict[tuple[str, int, int, int], list[TraceEvent]]:
+	"""Groups framelet events into per-frame timelines, one per replica of the framelets of redundant streams.
+
+	Parameters
+	----------
+	events : list[TraceEvent]
+		Decoded trace events.
+
+	Returns
+	-------
+	dict[tuple[str, int, int, int], list[TraceEvent]]
+		The time-ordered events of each framelet, keyed by stream, instance, framelet index and route index.
+	"""
+
+	frames: dict[tuple[str, int, int, int], list[TraceEvent]] = defaultdict(list)
+
+	for event in events:
+		if event.stream is not None:
+			frames[(event.stream, event.instance, event.framelet, event.route)].append(event)
+
+	for timeline in frames.values():
+		timeline.sort(key=lambda event: event.time)
+
+	return dict(frames)
+
+
+def main() -> int:
+	parser = ArgumentParser(description="Print the per-frame timelines of a simulation trace.")
+	parser.add_argument("file", type=Path, help="A trace file.", metavar="FILE")
+	parser.add_argument("--stream", help="Only print the timelines of stream ID.", metavar="ID")
+	args = parser.parse_args()
+
+	events, dropped = read(args.file)
+
+	if dropped:
+		print(f"{dropped} older events have been overwritten")
+
+	for (stream, instance, framelet, route), timeline in sorted(timelines(events).items()):
+		if args.stream is not None and stream != args.stream:
+			continue
+
+		print(f"{stream}/{instance}/{framelet} (route {route})")
+		for event in timeline:
+			hop = f" -> {event.peer}" if event.peer is not None else ""
+			print(f"\t{event.time:12.3f} {event.kind.name:<8} {event.device}{hop}")
+
+	return 0
+
+
+if __name__ == "__main__":
+	main()